@@ -1,80 +1,348 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from bisect import bisect_right
+from sortedcontainers import SortedList
+import itertools
+import re
+import hashlib
+import json
 import uvicorn
 
+# Albums are serialized from their field dict (vars(album) is what model_dump() returns for
+# this flat model, without the per-object validation overhead)
+try:
+    # Several times faster than the standard library for large listings
+    import orjson
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value)
+except ImportError:
+    def dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
 # Album model using Pydantic for request/response validation
 class Album(BaseModel):
     id: str
     title: str
     artist: str
-    price: float
+    # NaN would break the ordering of the sorted price index
+    price: float = Field(allow_inf_nan=False)
 
 # Update model (for PUT requests where ID might not be in body)
 class AlbumUpdate(BaseModel):
     title: str
     artist: str
-    price: float
+    price: float = Field(allow_inf_nan=False)
 
 # Initialize FastAPI app
 app = FastAPI(title="Albums API", version="1.0.0")
 
-albums = [
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return re.findall(r"\w+", text.lower())
+
+# In-memory album store: a dict keyed by id gives O(1) lookup, update and delete,
+# and keeps insertion order for listing. Secondary indexes answer searches without
+# scanning: inverted indexes from artist and title tokens to ids, a sorted list of
+# title tokens for prefix queries, and a sorted (price, id) list for price ranges.
+# The sorted indexes are SortedLists, so adding and removing an entry costs O(log n)
+# rather than the O(n) shift of a plain list.
+class AlbumRepository:
+    def __init__(self, albums=()):
+        # Bumped on every mutation; never goes back, so it can key cached responses
+        self.version = 0
+        # Source of cursors; not reset by clear() so old cursors never point at new albums
+        self._counter = itertools.count()
+        self.clear()
+        for album in albums:
+            self.add(album)
+
+    def __len__(self):
+        return len(self._albums)
+
+    def list(self):
+        """Return all albums in insertion order"""
+        return list(self._albums.values())
+
+    def get(self, id: str) -> Optional[Album]:
+        """Return the album with this id, or None"""
+        return self._albums.get(id)
+
+    def add(self, album: Album) -> bool:
+        """Add an album; return False if its id is already taken"""
+        if album.id in self._albums:
+            return False
+        self.version += 1
+        self._albums[album.id] = album
+        seq = next(self._counter)
+        self._order[album.id] = seq
+        self._seqs.append(seq)
+        self._seq_ids.append(album.id)
+        self._index(album)
+        return True
+
+    def update(self, id: str, fields: AlbumUpdate) -> Optional[Album]:
+        """Update an album in place; return None if it does not exist"""
+        album = self._albums.get(id)
+        if album is None:
+            return None
+        self.version += 1
+        self._unindex(album)
+        album.title = fields.title
+        album.artist = fields.artist
+        album.price = fields.price
+        self._index(album)
+        return album
+
+    def delete(self, id: str) -> bool:
+        """Delete an album; return False if it does not exist"""
+        album = self._albums.pop(id, None)
+        if album is None:
+            return False
+        self.version += 1
+        del self._order[id]
+        self._unindex(album)
+        self._stale += 1
+        # Drop deleted entries from the cursor lists once they make up half of them
+        if self._stale > 1024 and 2 * self._stale > len(self._seqs):
+            self._compact()
+        return True
+
+    def clear(self):
+        self.version += 1
+        self._albums = {}
+        self._order = {}
+        self._seqs = []
+        self._seq_ids = []
+        self._stale = 0
+        self._artist_index = {}
+        self._title_index = {}
+        self._title_tokens = SortedList()
+        self._prices = SortedList()
+
+    def search(self, artist: Optional[str] = None, title: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Album]:
+        """Return the albums matching every given filter, in insertion order.
+
+        artist matches albums whose artist contains all the query's words; title matches
+        albums whose title has a word starting with each of the query's words.
+        """
+        candidates = self._candidates(artist, title, min_price, max_price)
+        if not candidates:
+            return self.list()
+        return [album for _, album in self._search_pairs(candidates)]
+
+    def search_from(self, after: Optional[int] = None, **filters):
+        """Yield (cursor, album) pairs of the albums matching the filters, starting after a cursor"""
+        pairs = self._search_pairs(self._candidates(**filters))
+        start = 0 if after is None else bisect_right([seq for seq, _ in pairs], after)
+        return iter(pairs[start:])
+
+    def _candidates(self, artist=None, title=None, min_price=None, max_price=None):
+        candidates = []
+        # A text filter without any word matches nothing rather than being ignored
+        if artist is not None:
+            candidates += [self._artist_index.get(token, set()) for token in tokenize(artist)] or [set()]
+        if title is not None:
+            candidates += [self._title_prefix(token) for token in tokenize(title)] or [set()]
+        if min_price is not None or max_price is not None:
+            candidates.append(self._price_range(min_price, max_price))
+        return candidates
+
+    def _search_pairs(self, candidates):
+        if not candidates:
+            return list(self.iter_from())
+        # Intersect starting from the smallest set; each step costs the size of the smaller side
+        candidates.sort(key=len)
+        ids = set(candidates[0])
+        for other in candidates[1:]:
+            ids &= other
+        return sorted(((self._order[id], self._albums[id]) for id in ids), key=lambda pair: pair[0])
+
+    def iter_from(self, after: Optional[int] = None):
+        """Yield (cursor, album) pairs in insertion order, starting after a cursor"""
+        # Compaction swaps in new lists, so an iteration in progress keeps its own references
+        seqs, ids = self._seqs, self._seq_ids
+        start = 0 if after is None else bisect_right(seqs, after)
+        for i in range(start, len(seqs)):
+            # Deleted albums stay in the lists until compaction; a re-added id has a newer cursor
+            if self._order.get(ids[i]) == seqs[i]:
+                album = self._albums.get(ids[i])
+                if album is not None:
+                    yield seqs[i], album
+
+    def _compact(self):
+        live = [(seq, id) for seq, id in zip(self._seqs, self._seq_ids) if self._order.get(id) == seq]
+        self._seqs = [seq for seq, _ in live]
+        self._seq_ids = [id for _, id in live]
+        self._stale = 0
+
+    def _title_prefix(self, prefix):
+        ids = set()
+        for token in self._title_tokens.irange(minimum=prefix):
+            if not token.startswith(prefix):
+                break
+            ids |= self._title_index[token]
+        return ids
+
+    def _price_range(self, min_price, max_price):
+        low = None if min_price is None else (min_price,)
+        # (max_price, chr(0x10FFFF)) sorts after every (max_price, id) pair
+        high = None if max_price is None else (max_price, chr(0x10FFFF))
+        return {id for _, id in self._prices.irange(low, high)}
+
+    def _index(self, album):
+        for token in set(tokenize(album.artist)):
+            self._artist_index.setdefault(token, set()).add(album.id)
+        for token in set(tokenize(album.title)):
+            if token not in self._title_index:
+                self._title_index[token] = set()
+                self._title_tokens.add(token)
+            self._title_index[token].add(album.id)
+        self._prices.add((album.price, album.id))
+
+    def _unindex(self, album):
+        for token in set(tokenize(album.artist)):
+            ids = self._artist_index[token]
+            ids.discard(album.id)
+            if not ids:
+                del self._artist_index[token]
+        for token in set(tokenize(album.title)):
+            ids = self._title_index[token]
+            ids.discard(album.id)
+            if not ids:
+                del self._title_index[token]
+                self._title_tokens.remove(token)
+        self._prices.remove((album.price, album.id))
+
+albums = AlbumRepository([
     Album(id="1", title="Life of a Showgirl", artist="Taylor Swift", price=13.99),
     Album(id="2", title="Brat", artist="Charli XCX", price=17.99),
     Album(id="3", title="Hurry Up Tomorrow", artist="Weeknd", price=19.99),
-]
+])
+
+# Cursor pagination: the cursor of an album is its insertion sequence number, so a page
+# boundary stays valid while albums before it are added or deleted
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Albums serialized per chunk of an NDJSON stream
+NDJSON_BATCH = 500
+
+def paginate(pairs, limit: int):
+    """Take one page from (cursor, album) pairs; return its albums and the next page's cursor, or None"""
+    page = list(itertools.islice(pairs, limit + 1))
+    next_cursor = page[limit - 1][0] if len(page) > limit else None
+    return [album for _, album in page[:limit]], next_cursor
+
+def ndjson_stream(items):
+    """Serialize albums as NDJSON lines, a batch per chunk, so memory does not grow with the catalog"""
+    batch = []
+    for album in items:
+        batch.append(dumps(vars(album)))
+        if len(batch) == NDJSON_BATCH:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+# Serialized body of the full listing, rebuilt only after the catalog changed
+_listing_cache = {"version": None, "body": b"", "etag": ""}
+
+def cached_listing():
+    """Return the JSON body and ETag of all albums, serializing at most once per catalog version"""
+    if _listing_cache["version"] != albums.version:
+        body = dumps([vars(album) for album in albums.list()])
+        _listing_cache.update(
+            version=albums.version,
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        )
+    return _listing_cache["body"], _listing_cache["etag"]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as for GET)"""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
 
 # GET /albums - Get all albums
 @app.get("/albums", response_model=List[Album])
-async def get_albums():
-    """Get all albums"""
-    return albums
+async def get_albums(artist: Optional[str] = None, title: Optional[str] = None,
+                     min_price: Optional[float] = Query(None, allow_inf_nan=False),
+                     max_price: Optional[float] = Query(None, allow_inf_nan=False),
+                     limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None,
+                     format: str = Query("json", pattern="^(json|ndjson)$"),
+                     if_none_match: Optional[str] = Header(None)):
+    """Get all albums, optionally filtered by artist, title words and price range.
+
+    With limit or after, one page is returned and the cursor of the next page is sent in
+    the X-Next-Cursor header. format=ndjson streams one album per line.
+    """
+    for name, value in (("artist", artist), ("title", title)):
+        if value is not None and not tokenize(value):
+            raise HTTPException(status_code=422, detail=f"{name} must contain at least one word")
+    filters = {"artist": artist, "title": title, "min_price": min_price, "max_price": max_price}
+    filtered = any(value is not None for value in filters.values())
+    paginated = limit is not None or after is not None
+    if not filtered and not paginated and format == "json":
+        # The unfiltered listing is served from a cache that is invalidated by album changes
+        body, etag = cached_listing()
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    pairs = albums.search_from(after, **filters) if filtered else albums.iter_from(after)
+    headers = {}
+    if paginated:
+        items, next_cursor = paginate(pairs, limit or DEFAULT_PAGE_SIZE)
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+    else:
+        items = (album for _, album in pairs)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_stream(items), media_type="application/x-ndjson", headers=headers)
+    return Response(content=dumps([vars(album) for album in items]), media_type="application/json", headers=headers)
 
 # POST /albums - Create a new album
 @app.post("/albums", response_model=Album, status_code=201)
 async def post_albums(album: Album):
     """Add a new album"""
-    albums.append(album)
+    if not albums.add(album):
+        raise HTTPException(status_code=409, detail="album already exists")
     return album
 
 # GET /albums/{id} - Get album by ID
 @app.get("/albums/{id}", response_model=Album)
 async def get_album_by_id(id: str):
     """Get a specific album by ID"""
-    for album in albums:
-        if album.id == id:
-            return album
-    raise HTTPException(status_code=404, detail="album not found")
+    album = albums.get(id)
+    if album is None:
+        raise HTTPException(status_code=404, detail="album not found")
+    return album
 
 # PUT /albums/{id} - Update an existing album
 @app.put("/albums/{id}", response_model=Album)
 async def update_existing_album(id: str, updated_album: AlbumUpdate):
     """Update an existing album"""
-    for i, album in enumerate(albums):
-        if album.id == id:
-            # Update the album fields
-            albums[i].title = updated_album.title
-            albums[i].artist = updated_album.artist
-            albums[i].price = updated_album.price
-            return albums[i]
-    
-    raise HTTPException(status_code=404, detail="album not found")
+    album = albums.update(id, updated_album)
+    if album is None:
+        raise HTTPException(status_code=404, detail="album not found")
+    return album
 
 # DELETE /albums/{id} - Delete an album
 @app.delete("/albums/{id}")
 async def delete_album(id: str):
     """Delete an album by ID"""
-    for i, album in enumerate(albums):
-        if album.id == id:
-            albums.pop(i)
-            return {"message": "album deleted successfully"}
-    
-    raise HTTPException(status_code=404, detail="album not found")
+    if not albums.delete(id):
+        raise HTTPException(status_code=404, detail="album not found")
+    return {"message": "album deleted successfully"}
 
 def print_this():
     if albums:
-        print(albums[0].id)
+        print(albums.list()[0].id)
 
 # Main entry point
 if __name__ == "__main__":
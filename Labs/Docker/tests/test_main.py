@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import Album, app, albums
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def reset_data():
+    """Start every test from a known catalog"""
+    albums.clear()
+    for album in [
+        Album(id="1", title="Life of a Showgirl", artist="Taylor Swift", price=13.99),
+        Album(id="2", title="Brat", artist="Charli XCX", price=17.99),
+        Album(id="3", title="Hurry Up Tomorrow", artist="Weeknd", price=19.99),
+    ]:
+        albums.add(album)
+    yield
+
+
+def search(**params):
+    response = client.get("/albums", params=params)
+    assert response.status_code == 200
+    return [album["id"] for album in response.json()]
+
+
+def test_search_by_artist_title_and_price():
+    """Test each filter and their combination"""
+    assert search(artist="taylor") == ["1"]
+    assert search(title="show") == ["1"]
+    assert search(min_price=15, max_price=20) == ["2", "3"]
+    assert search(artist="swift", max_price=10) == []
+
+
+def test_search_after_post():
+    """Test that a new album is found by every index"""
+    response = client.post("/albums", json={"id": "4", "title": "Showbiz", "artist": "Muse", "price": 9.5})
+    assert response.status_code == 201
+    assert search(title="show") == ["1", "4"]
+    assert search(artist="muse") == ["4"]
+    assert search(max_price=10) == ["4"]
+
+
+def test_search_after_put():
+    """Test that an update moves the album between index entries"""
+    response = client.put("/albums/2", json={"title": "Brat Remixed", "artist": "Charli", "price": 5.0})
+    assert response.status_code == 200
+    assert search(artist="xcx") == []
+    assert search(artist="charli") == ["2"]
+    assert search(title="remix") == ["2"]
+    assert search(min_price=15) == ["3"]
+    assert search(max_price=5) == ["2"]
+
+
+def test_search_after_delete():
+    """Test that a deleted album leaves no index entries behind"""
+    assert client.delete("/albums/1").status_code == 200
+    assert search(artist="taylor") == []
+    assert search(title="show") == []
+    assert search(min_price=0) == ["2", "3"]
+    assert albums._prices == sorted(albums._prices)
+
+
+def test_duplicate_id_rejected():
+    """Test that POST with an existing id answers 409"""
+    response = client.post("/albums", json={"id": "1", "title": "Other", "artist": "Other", "price": 1.0})
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("price", ["NaN", "nan", "inf", "-Infinity"])
+def test_non_finite_price_rejected(price):
+    """Test that NaN and infinite prices cannot reach the price index"""
+    response = client.post("/albums", json={"id": "4", "title": "T", "artist": "A", "price": price})
+    assert response.status_code == 422
+    response = client.put("/albums/1", json={"title": "T", "artist": "A", "price": price})
+    assert response.status_code == 422
+    assert client.get("/albums", params={"min_price": price}).status_code == 422
+    assert search(min_price=0) == ["1", "2", "3"]
+
+
+def test_price_index_survives_equal_prices():
+    """Test deleting one of several albums with the same price"""
+    for i in range(4, 8):
+        client.post("/albums", json={"id": str(i), "title": "Same", "artist": "Same", "price": 13.99})
+    client.delete("/albums/5")
+    client.put("/albums/6", json={"title": "Same", "artist": "Same", "price": 1.0})
+    assert search(min_price=13.99, max_price=13.99) == ["1", "4", "7"]
+    assert search(max_price=1.0) == ["6"]
+
+
+@pytest.mark.parametrize("params", [{"artist": ""}, {"artist": "!!"}, {"title": " - "}])
+def test_text_filter_without_words_rejected(params):
+    """Test that empty or punctuation-only filters do not return the whole catalog"""
+    assert client.get("/albums", params=params).status_code == 422
+    assert albums.search(**params) == []
+
+
+def test_search_with_pagination():
+    """Test paging through filtered results with a cursor"""
+    for i in range(4, 10):
+        client.post("/albums", json={"id": str(i), "title": f"Show {i}", "artist": "Bench", "price": 1.0})
+    first = client.get("/albums", params={"artist": "bench", "limit": 4})
+    assert [a["id"] for a in first.json()] == ["4", "5", "6", "7"]
+    second = client.get("/albums", params={"artist": "bench", "limit": 4, "after": first.headers["x-next-cursor"]})
+    assert [a["id"] for a in second.json()] == ["8", "9"]
+
+
+def test_listing_cache_follows_changes():
+    """Test that the cached listing and its ETag change after a write"""
+    first = client.get("/albums")
+    etag = first.headers["etag"]
+    assert client.get("/albums", headers={"If-None-Match": etag}).status_code == 304
+    client.delete("/albums/3")
+    second = client.get("/albums", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert [a["id"] for a in second.json()] == ["1", "2"]
+    assert main.cached_listing()[1] == second.headers["etag"]
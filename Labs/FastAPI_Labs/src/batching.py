@@ -0,0 +1,126 @@
+import asyncio
+import inspect
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-row predictions into one vectorized predict call.
+    Args:
+        predict_fn (callable): Function or coroutine function that scores a (n_rows, n_features) array.
+        max_batch_size (int): Maximum number of rows scored together.
+        max_wait_ms (float): Maximum time the first row of a batch waits for more rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._last_batch_size = 0
+
+    async def start(self):
+        """
+        Start the background task that drains the request queue.
+        """
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background task and fail any requests still waiting.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("micro-batcher stopped"))
+
+    async def submit(self, row):
+        """
+        Queue one feature row and wait for its prediction.
+        Args:
+            row (list): Feature values of a single record.
+        Returns:
+            The prediction for this row.
+        """
+        if self._worker is None:
+            raise RuntimeError("micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    def stats(self):
+        """
+        Report queue depth and batch size metrics.
+        Returns:
+            dict: Current queue depth and counters of scored batches.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "rows": self._rows,
+            "mean_batch_size": self._rows / self._batches if self._batches else 0.0,
+            "largest_batch_size": self._largest_batch,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before waiting on the clock
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        pending = set()
+        while True:
+            batch = await self._collect()
+            self._batches += 1
+            self._rows += len(batch)
+            self._last_batch_size = len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            # Score in a separate task so the next batch can be collected meanwhile
+            task = asyncio.create_task(self._score(batch))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    async def _score(self, batch):
+        futures = [future for _, future in batch]
+        try:
+            predictions = self.predict_fn(np.asarray([row for row, _ in batch], dtype=np.float64))
+            if inspect.isawaitable(predictions):
+                predictions = await predictions
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future, prediction in zip(futures, predictions):
+                if not future.done():
+                    future.set_result(prediction)
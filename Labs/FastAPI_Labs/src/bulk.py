@@ -0,0 +1,169 @@
+import csv
+import json
+
+import numpy as np
+
+FORMATS = ("csv", "ndjson")
+
+
+class RowParser:
+    """
+    Incremental parser turning CSV (with a header row) or NDJSON bytes into feature rows.
+    Bytes can be fed in arbitrary pieces; only complete lines are parsed, so memory use is
+    bounded by the longest line rather than by the size of the input.
+    Args:
+        fmt (str): "csv" or "ndjson".
+        features (list): Feature names in model column order.
+    """
+
+    def __init__(self, fmt, features):
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported format {fmt!r}, expected one of {FORMATS}")
+        self.fmt = fmt
+        self.features = list(features)
+        self.line_number = 0
+        self._buffer = b""
+        self._columns = None
+
+    def feed(self, data):
+        """
+        Parse the complete lines contained in data plus whatever was left over from earlier calls.
+        Args:
+            data (bytes): Next piece of the input.
+        Returns:
+            list: Feature rows, each a list of floats in model column order.
+        """
+        lines = (self._buffer + data).split(b"\n")
+        self._buffer = lines.pop()
+        return self._parse(lines)
+
+    def close(self):
+        """
+        Parse the last line if the input did not end with a newline.
+        Returns:
+            list: Remaining feature rows.
+        """
+        lines, self._buffer = [self._buffer], b""
+        return self._parse(lines)
+
+    def _parse(self, lines):
+        rows = []
+        for raw in lines:
+            self.line_number += 1
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            try:
+                if self.fmt == "ndjson":
+                    record = json.loads(line)
+                    rows.append([float(record[name]) for name in self.features])
+                elif self._columns is None:
+                    self._read_header(line)
+                else:
+                    values = next(csv.reader([line]))
+                    rows.append([float(values[i]) for i in self._columns])
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                raise ValueError(f"line {self.line_number}: {e!r}") from e
+        return rows
+
+    def _read_header(self, line):
+        header = [name.strip() for name in next(csv.reader([line]))]
+        missing = [name for name in self.features if name not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing columns {missing}")
+        self._columns = [header.index(name) for name in self.features]
+
+
+def format_predictions(predictions, fmt):
+    """
+    Serialize a chunk of predictions in the output format matching the input.
+    Args:
+        predictions (numpy.ndarray): Predictions of one chunk.
+        fmt (str): "csv" or "ndjson".
+    Returns:
+        bytes: One line per prediction.
+    """
+    if fmt == "csv":
+        return "".join(f"{float(value)!r}\n" for value in predictions).encode()
+    return "".join(json.dumps({"prediction": float(value)}) + "\n" for value in predictions).encode()
+
+
+def output_header(fmt):
+    """
+    Return the bytes written before the first prediction.
+    Args:
+        fmt (str): "csv" or "ndjson".
+    Returns:
+        bytes: The CSV header line, or nothing for NDJSON.
+    """
+    return b"prediction\n" if fmt == "csv" else b""
+
+
+def iter_chunks(blocks, parser, chunk_size):
+    """
+    Turn a stream of byte blocks into feature matrices of at most chunk_size rows.
+    Args:
+        blocks (iterable): Byte blocks of the input.
+        parser (RowParser): Parser for the input format.
+        chunk_size (int): Maximum rows per matrix.
+    Yields:
+        numpy.ndarray: Feature matrix of shape (n_rows, n_features).
+    """
+    pending = []
+    for block in blocks:
+        pending.extend(parser.feed(block))
+        while len(pending) >= chunk_size:
+            yield np.asarray(pending[:chunk_size], dtype=np.float64)
+            del pending[:chunk_size]
+    pending.extend(parser.close())
+    for start in range(0, len(pending), chunk_size):
+        yield np.asarray(pending[start:start + chunk_size], dtype=np.float64)
+
+
+def score_file(src, dst, fmt, features, predict_fn, chunk_size=1000, block_size=1 << 16):
+    """
+    Score a CSV or NDJSON file chunk by chunk and write one prediction per input row.
+    Args:
+        src (file): Binary input file.
+        dst (file): Binary output file.
+        fmt (str): "csv" or "ndjson".
+        features (list): Feature names in model column order.
+        predict_fn (callable): Function that scores a feature matrix.
+        chunk_size (int): Rows scored per predict call.
+        block_size (int): Bytes read from src at a time.
+    Returns:
+        int: Number of rows scored.
+    """
+    blocks = iter(lambda: src.read(block_size), b"")
+    n_rows = 0
+    dst.write(output_header(fmt))
+    for X in iter_chunks(blocks, RowParser(fmt, features), chunk_size):
+        dst.write(format_predictions(predict_fn(X), fmt))
+        n_rows += len(X)
+    return n_rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    from predict import predict_data
+
+    # Same column order as DiabetesData in main.py, without importing FastAPI
+    FEATURES = ["age", "sex", "bmi", "bp", "total_serum_cholesterol", "ldl_cholesterol",
+                "hdl_cholesterol", "cholesterol_hdl_ratio", "log_serum_triglycerides", "blood_sugar_level"]
+
+    parser = argparse.ArgumentParser(description="Score a CSV or NDJSON file of DiabetesData rows")
+    parser.add_argument("input", help="input file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.endswith(".csv") else "ndjson")
+    src = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    with src, dst:
+        n_rows = score_file(src, dst, fmt, FEATURES, predict_data, args.chunk_size)
+    print(f"Scored {n_rows} rows from {os.path.basename(args.input)}", file=sys.stderr)
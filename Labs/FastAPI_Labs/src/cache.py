@@ -0,0 +1,115 @@
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions keyed on the feature vector.
+    Entries expire after a TTL and the whole cache is dropped when the model version changes.
+    Args:
+        maxsize (int): Maximum number of cached predictions.
+        ttl (float): Seconds an entry stays valid.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(features):
+        """
+        Build a canonical key for a feature vector.
+        Args:
+            features (list): Feature values in model column order.
+        Returns:
+            bytes: Digest of the packed float64 values.
+        """
+        # Adding 0.0 folds -0.0 into 0.0 so equal vectors always hash the same
+        packed = struct.pack(f"<{len(features)}d", *(float(value) + 0.0 for value in features))
+        return hashlib.blake2b(packed, digest_size=16).digest()
+
+    def get(self, key, version):
+        """
+        Look up a prediction.
+        Args:
+            key (bytes): Key built with make_key.
+            version (str): Version of the model currently serving.
+        Returns:
+            The cached prediction, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version):
+        """
+        Store a prediction, evicting the least recently used entry when full.
+        Args:
+            key (bytes): Key built with make_key.
+            value: Prediction to cache.
+            version (str): Version of the model that produced the prediction.
+        """
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop all cached predictions.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Report cache size and counters.
+        Returns:
+            dict: Size, bounds and hit/miss/eviction counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self._version,
+        }
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
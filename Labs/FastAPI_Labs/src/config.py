@@ -0,0 +1,29 @@
+import os
+
+# Maximum number of rows accepted by a single /predict/batch request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# Server-side micro-batching of concurrent /predict calls
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# "sklearn" serves the pickled estimator, "compiled" the flattened NumPy tree
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn").lower()
+
+# In-process LRU cache in front of /predict; a size of 0 disables it
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+
+# Where inference runs: "thread" or "process" pool, or "none" to run on the event loop
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+# Requests allowed to wait for a free worker before /predict answers 503
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+
+# Rows scored per predict call by /predict/stream
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# /predict/stream bodies are buffered in memory up to this many bytes, then in a temporary file
+BULK_SPOOL_MAX_MEMORY = int(os.getenv("BULK_SPOOL_MAX_MEMORY", str(8 << 20)))
+# Bytes of the buffered body parsed at a time
+BULK_READ_SIZE = int(os.getenv("BULK_READ_SIZE", str(1 << 16)))
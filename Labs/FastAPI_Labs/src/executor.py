@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import predict
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def _init_worker():
+    # Runs once in every pool process so the first request does not pay for the load
+    predict.registry.load()
+
+
+class InferenceExecutor:
+    """
+    Runs inference in a thread or process pool so it never blocks the event loop.
+    Args:
+        mode (str): "thread" or "process".
+        workers (int): Number of pool workers.
+        max_queue (int): Number of requests allowed to wait for a free worker.
+    """
+
+    def __init__(self, mode="thread", workers=4, max_queue=64):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"unknown executor mode {mode!r}, expected 'thread' or 'process'")
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._in_flight = 0
+        self._rejected = 0
+
+    def start(self):
+        """
+        Create the worker pool. Process workers preload the model.
+        """
+        if self.mode == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    def shutdown(self):
+        """
+        Stop the worker pool.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, X):
+        """
+        Score a feature matrix in the pool.
+        Args:
+            X (numpy.ndarray): Input data for which predictions are to be made.
+        Returns:
+            numpy.ndarray: Predicted class labels.
+        Raises:
+            ExecutorSaturated: If workers + max_queue requests are already in flight.
+        """
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturated("inference workers are saturated")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, predict.predict_data, X)
+        finally:
+            self._in_flight -= 1
+
+    def stats(self):
+        """
+        Report pool size and load.
+        Returns:
+            dict: Mode, worker count, in-flight and rejected request counts.
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+        }
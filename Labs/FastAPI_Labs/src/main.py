@@ -1,9 +1,90 @@
-from fastapi import FastAPI, status, HTTPException
-from pydantic import BaseModel
-from predict import predict_data
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+import os
+import resource
+import tempfile
+from typing import List, Optional
+from fastapi import FastAPI, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, model_validator
+import numpy as np
+from batching import MicroBatcher
+from bulk import FORMATS, RowParser, format_predictions, iter_chunks, output_header
+from cache import PredictionCache
+from config import (MAX_BATCH_SIZE, MICRO_BATCHING, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+                    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL,
+                    INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, BULK_CHUNK_SIZE,
+                    BULK_SPOOL_MAX_MEMORY, BULK_READ_SIZE)
+from executor import ExecutorSaturated, InferenceExecutor
+from predict import model_version, predict_data, registry
 import uvicorn
 
-app = FastAPI()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("diabetes_api")
+
+# Filled in by the lifespan handler; /ready answers 503 until startup has finished
+startup = {"ready": False, "timings_ms": {"imports": (time.perf_counter() - _import_started) * 1000}}
+
+executor = InferenceExecutor(INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE) if INFERENCE_EXECUTOR != "none" else None
+
+async def run_inference(X):
+    """
+    Score a feature matrix, off the event loop when an executor is configured.
+    Args:
+        X (numpy.ndarray): Input data for which predictions are to be made.
+    Returns:
+        numpy.ndarray: Predicted class labels.
+    """
+    if executor is not None:
+        return await executor.run(X)
+    return predict_data(X)
+
+batcher = MicroBatcher(run_inference, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS) if MICRO_BATCHING else None
+cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+
+async def warm_up():
+    """
+    Run dummy inferences so lazy imports, pools and caches are paid for before readiness.
+    """
+    dummy = np.zeros((1, len(FEATURES)), dtype=np.float64)
+    # One call per worker so that every pool process is spawned and has preloaded the model
+    calls = executor.workers if executor is not None else 1
+    await asyncio.gather(*(run_inference(dummy) for _ in range(calls)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timings = startup["timings_ms"]
+    started = time.perf_counter()
+    # Load the model once at startup so requests are served from memory
+    registry.load()
+    timings["model_load"] = (time.perf_counter() - started) * 1000
+
+    step = time.perf_counter()
+    if executor is not None:
+        executor.start()
+    if batcher is not None:
+        await batcher.start()
+    await warm_up()
+    timings["warmup"] = (time.perf_counter() - step) * 1000
+    timings["total"] = timings["imports"] + (time.perf_counter() - started) * 1000
+
+    startup["ready"] = True
+    logger.info("Startup finished in %.1f ms (imports %.1f ms, model load %.1f ms, warmup %.1f ms), model version %s",
+                timings["total"], timings["imports"], timings["model_load"], timings["warmup"], registry.version)
+    yield
+    startup["ready"] = False
+    if batcher is not None:
+        await batcher.stop()
+    if executor is not None:
+        executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 class DiabetesData(BaseModel):
     age: float
@@ -17,13 +98,77 @@ class DiabetesData(BaseModel):
     log_serum_triglycerides: float  # s5
     blood_sugar_level: float  # s6
 
+# Column order expected by the model
+FEATURES = list(DiabetesData.model_fields)
+
+class DiabetesColumns(BaseModel):
+    age: List[float]
+    sex: List[float]
+    bmi: List[float]
+    bp: List[float]
+    total_serum_cholesterol: List[float]
+    ldl_cholesterol: List[float]
+    hdl_cholesterol: List[float]
+    cholesterol_hdl_ratio: List[float]
+    log_serum_triglycerides: List[float]
+    blood_sugar_level: List[float]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if len({len(getattr(self, name)) for name in FEATURES}) > 1:
+            raise ValueError("all feature columns must have the same length")
+        return self
+
+class DiabetesBatch(BaseModel):
+    records: Optional[List[DiabetesData]] = None
+    columns: Optional[DiabetesColumns] = None
+
+    @model_validator(mode="after")
+    def check_payload(self):
+        if (self.records is None) == (self.columns is None):
+            raise ValueError("provide exactly one of 'records' or 'columns'")
+        return self
+
+    def __len__(self):
+        if self.records is not None:
+            return len(self.records)
+        return len(self.columns.age)
+
+    def to_array(self):
+        """
+        Pack the batch into one contiguous (n_rows, n_features) array.
+        Returns:
+            numpy.ndarray: Feature matrix in model column order.
+        """
+        if self.records is not None:
+            X = np.empty((len(self.records), len(FEATURES)), dtype=np.float64)
+            for i, record in enumerate(self.records):
+                X[i] = [getattr(record, name) for name in FEATURES]
+            return X
+        return np.column_stack([np.asarray(getattr(self.columns, name), dtype=np.float64) for name in FEATURES])
+
 class DiabetesResponse(BaseModel):
     response: float
 
+class DiabetesBatchResponse(BaseModel):
+    responses: List[float]
+
+class ModelInfo(BaseModel):
+    path: str
+    version: str
+    mtime: int
+    loaded_at: str
+
 @app.get("/", status_code=status.HTTP_200_OK)
 async def health_ping():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness():
+    if not startup["ready"]:
+        raise HTTPException(status_code=503, detail="model is loading")
+    return {"status": "ready", "model_version": registry.version, "startup_ms": startup["timings_ms"]}
+
 @app.post("/predict", response_model=DiabetesResponse)
 async def predict_diabetes(diabetes_features: DiabetesData):
     try:
@@ -40,9 +185,126 @@ async def predict_diabetes(diabetes_features: DiabetesData):
             diabetes_features.blood_sugar_level
         ]]
 
-        prediction = predict_data(features)
-        return DiabetesResponse(response=float(prediction[0]))
+        if cache is not None:
+            key = cache.make_key(features[0])
+            # A stat at most, never a model load: that happens in the inference call below
+            version = model_version()
+            cached = cache.get(key, version) if version is not None else None
+            if cached is not None:
+                return DiabetesResponse(response=cached)
+
+        if batcher is not None:
+            prediction = float(await batcher.submit(features[0]))
+        else:
+            prediction = float((await run_inference(features))[0])
+
+        if cache is not None:
+            # When the artifact had changed, inference reloaded it; key the entry by the new version
+            cache.put(key, prediction, version if version is not None else registry.version)
+        return DiabetesResponse(response=prediction)
     
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/batch", response_model=DiabetesBatchResponse)
+async def predict_diabetes_batch(batch: DiabetesBatch):
+    if len(batch) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"batch size exceeds the limit of {MAX_BATCH_SIZE} rows")
+    if len(batch) == 0:
+        return DiabetesBatchResponse(responses=[])
+    try:
+        predictions = await run_inference(batch.to_array())
+        return DiabetesBatchResponse(responses=predictions.tolist())
+
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def process_memory():
+    """
+    Report the memory of this worker process.
+    Returns:
+        dict: Pid, resident and shared bytes (Linux only), and peak resident bytes.
+    """
+    usage = {"pid": os.getpid(), "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(value) for value in f.read().split()[:3])
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        usage.update(rss_bytes=resident * page_size, shared_bytes=shared * page_size)
+    except OSError:
+        pass
+    return usage
+
+@app.post("/predict/stream")
+async def predict_diabetes_stream(request: Request, format: Optional[str] = None, chunk_size: int = BULK_CHUNK_SIZE):
+    """
+    Score a CSV or NDJSON body of DiabetesData rows chunk by chunk, streaming predictions back.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"unsupported format {fmt!r}, expected one of {FORMATS}")
+    if not 1 <= chunk_size <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {MAX_BATCH_SIZE}")
+
+    # Receive the whole body before the response starts: with ASGI < 2.4, StreamingResponse
+    # listens for disconnects on the same receive channel and would take body chunks away
+    # from a generator still reading the request. Large uploads go to a temporary file.
+    spool = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_MAX_MEMORY)
+    # Writes may go to disk and parsing is CPU-bound; keep both off the event loop
+    async for data in request.stream():
+        await run_in_threadpool(spool.write, data)
+    await run_in_threadpool(spool.seek, 0)
+
+    chunks = iter_chunks(iter(lambda: spool.read(BULK_READ_SIZE), b""), RowParser(fmt, FEATURES), chunk_size)
+    # Parse the first chunk (and the CSV header) now so bad input still gets a 400
+    try:
+        first = await run_in_threadpool(next, chunks, None)
+    except ValueError as e:
+        spool.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def generate():
+        try:
+            yield output_header(fmt)
+            X = first
+            while X is not None:
+                yield format_predictions(await run_inference(X), fmt)
+                X = await run_in_threadpool(next, chunks, None)
+        except (ValueError, ExecutorSaturated) as e:
+            # Headers are already sent, so report the error in-band and stop
+            logger.error("Streaming prediction failed: %s", e)
+            yield (f"# error: {e}\n" if fmt == "csv" else json.dumps({"error": str(e)}) + "\n").encode()
+        finally:
+            spool.close()
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "process": process_memory(),
+        "batching": batcher.stats() if batcher is not None else None,
+        "cache": cache.stats() if cache is not None else None,
+        "executor": executor.stats() if executor is not None else None,
+    }
+
+@app.get("/model", response_model=ModelInfo)
+async def model_info():
+    info = registry.info()
+    if info is None:
+        raise HTTPException(status_code=503, detail="model not loaded")
+    return info
+
+@app.post("/model/reload", response_model=ModelInfo)
+async def reload_model():
+    try:
+        return registry.reload()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
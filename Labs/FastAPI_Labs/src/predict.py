@@ -1,4 +1,19 @@
-import joblib
+import os
+
+from config import INFERENCE_ENGINE
+from registry import ModelRegistry
+from tree_engine import CompiledTree
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../model")
+MODEL_PATH = os.path.join(MODEL_DIR, "diabetes_model.pkl")
+TREE_PATH = os.path.join(MODEL_DIR, "diabetes_tree", "manifest.json")
+
+if INFERENCE_ENGINE == "compiled":
+    registry = ModelRegistry(TREE_PATH, loader=CompiledTree.load)
+elif INFERENCE_ENGINE == "sklearn":
+    registry = ModelRegistry(MODEL_PATH)
+else:
+    raise ValueError(f"unknown INFERENCE_ENGINE {INFERENCE_ENGINE!r}, expected 'sklearn' or 'compiled'")
 
 def predict_data(X):
     """
@@ -8,6 +23,15 @@ def predict_data(X):
     Returns:
         y_pred (numpy.ndarray): Predicted class labels.
     """
-    model = joblib.load("../model/diabetes_model.pkl")
+    model = registry.get()
     y_pred = model.predict(X)
     return y_pred
+
+def model_version():
+    """
+    Return the version of the model currently loaded, without loading or reloading it.
+    Returns:
+        str: Short content hash of the model artifact, or None if the artifact changed on
+        disk since it was loaded (the next predict_data call reloads it).
+    """
+    return registry.current_version()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def joblib_load(path):
+    # Imported on first load so that starting the app does not pay for joblib and sklearn
+    import joblib
+    return joblib.load(path)
+
+
+class ModelRegistry:
+    """
+    Keeps a single in-memory copy of a model artifact and reloads it when the file changes.
+    Args:
+        path (str): Path to the serialized model artifact.
+        loader (callable): Function that turns a path into a model object.
+        check_interval (float): Minimum number of seconds between two mtime checks.
+    """
+
+    def __init__(self, path, loader=joblib_load, check_interval=1.0):
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._last_check = 0.0
+        # mtime seen by the last current_version() check, which never loads
+        self._peek_mtime = None
+        self._last_peek = 0.0
+
+    def load(self):
+        """
+        Load the artifact from disk and swap it in atomically.
+        Returns:
+            dict: Metadata of the newly loaded model.
+        """
+        with self._lock:
+            return self._load_locked()
+
+    def reload(self):
+        """
+        Force a reload of the artifact, regardless of its mtime.
+        Returns:
+            dict: Metadata of the newly loaded model.
+        """
+        return self.load()
+
+    def get(self):
+        """
+        Return the cached model, reloading it first if the artifact changed on disk.
+        Returns:
+            object: The loaded model.
+        """
+        state = self._state
+        now = time.monotonic()
+        if state is None or now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if state is None or self._mtime() != state["mtime"]:
+                with self._lock:
+                    # Another thread may have reloaded while we waited for the lock
+                    if self._state is None or self._mtime() != self._state["mtime"]:
+                        self._load_locked()
+                state = self._state
+        return state["model"]
+
+    def info(self):
+        """
+        Describe the currently loaded model.
+        Returns:
+            dict: Path, version, mtime and load time of the model, or None if nothing is loaded.
+        """
+        state = self._state
+        if state is None:
+            return None
+        return {key: value for key, value in state.items() if key != "model"}
+
+    def current_version(self):
+        """
+        Return the version of the loaded model without ever loading one, so it is safe to call
+        on the event loop. The artifact's mtime is checked at most every check_interval seconds.
+        Returns:
+            str: Version of the loaded model, or None if nothing is loaded or the artifact
+            changed on disk and has not been reloaded yet.
+        """
+        state = self._state
+        if state is None:
+            return None
+        now = time.monotonic()
+        if self._peek_mtime is None or now - self._last_peek >= self.check_interval:
+            self._last_peek = now
+            try:
+                self._peek_mtime = self._mtime()
+            except OSError:
+                self._peek_mtime = None
+        return state["version"] if self._peek_mtime == state["mtime"] else None
+
+    @property
+    def version(self):
+        state = self._state
+        return state["version"] if state is not None else None
+
+    def _mtime(self):
+        return os.stat(self.path).st_mtime_ns
+
+    def _load_locked(self):
+        mtime = self._mtime()
+        with open(self.path, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+        model = self.loader(self.path)
+        self._state = {
+            "model": model,
+            "path": self.path,
+            "version": version,
+            "mtime": mtime,
+            "loaded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return self.info()
@@ -1,10 +1,12 @@
 from sklearn.tree import DecisionTreeClassifier
 import joblib
 from data import load_data, split_data
+from tree_engine import export_tree
 
 def fit_model(X_train, y_train):
     """
-    Train a Decision Tree Classifier and save the model to a file.
+    Train a Decision Tree Classifier and save the model to a file, along with
+    its flattened arrays for the compiled inference engine.
     Args:
         X_train (numpy.ndarray): Training features.
         y_train (numpy.ndarray): Training target values.
@@ -12,6 +14,7 @@ def fit_model(X_train, y_train):
     dt_classifier = DecisionTreeClassifier(max_depth=3, random_state=12)
     dt_classifier.fit(X_train, y_train)
     joblib.dump(dt_classifier, "../model/diabetes_model.pkl")
+    export_tree(dt_classifier, "../model/diabetes_tree")
 
 if __name__ == "__main__":
     X, y = load_data()
@@ -0,0 +1,353 @@
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from predict import MODEL_PATH, registry
+from registry import ModelRegistry
+
+SAMPLE = {
+    "age": 0.038,
+    "sex": 0.050,
+    "bmi": 0.061,
+    "bp": 0.021,
+    "total_serum_cholesterol": -0.044,
+    "ldl_cholesterol": -0.034,
+    "hdl_cholesterol": -0.043,
+    "cholesterol_hdl_ratio": -0.002,
+    "log_serum_triglycerides": 0.019,
+    "blood_sugar_level": -0.017,
+}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def test_health_ping(client):
+    """Test the liveness endpoint"""
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
+
+
+def test_predict(client):
+    """Test a single prediction"""
+    response = client.post("/predict", json=SAMPLE)
+    assert response.status_code == 200
+    assert isinstance(response.json()["response"], float)
+
+
+def test_model_loaded_at_startup(client):
+    """Test that the model is loaded once and reported by /model"""
+    response = client.get("/model")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["version"] == registry.version
+    assert data["loaded_at"]
+
+
+def test_model_reload(client):
+    """Test the admin reload endpoint"""
+    before = client.get("/model").json()
+    response = client.post("/model/reload")
+    assert response.status_code == 200
+    assert response.json()["version"] == before["version"]
+    assert response.json()["loaded_at"] >= before["loaded_at"]
+
+
+def test_registry_reloads_on_file_change(tmp_path):
+    """Test that the registry picks up a changed artifact"""
+    path = tmp_path / "model.pkl"
+    shutil.copy(MODEL_PATH, path)
+    local = ModelRegistry(str(path), check_interval=0)
+    first = local.get()
+    assert local.get() is first
+
+    path.write_bytes(path.read_bytes() + b"\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert local.get() is not first
+
+
+def test_registry_current_version_never_loads(tmp_path):
+    """Test that current_version reports a changed artifact without reloading it"""
+    path = tmp_path / "model.pkl"
+    shutil.copy(MODEL_PATH, path)
+    loads = []
+    local = ModelRegistry(str(path), loader=lambda p: loads.append(p) or object(), check_interval=0)
+    assert local.current_version() is None
+    assert loads == []
+
+    first = local.get()
+    version = local.current_version()
+    assert version == local.version
+    path.write_bytes(path.read_bytes() + b"\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert local.current_version() is None
+    assert len(loads) == 1
+    assert local.get() is not first
+    assert local.current_version() not in (None, version)
+
+
+def test_predict_batch_records_matches_single(client):
+    """Test that batch scoring returns the single-row results in input order"""
+    other = {name: -value for name, value in SAMPLE.items()}
+    single = [client.post("/predict", json=row).json()["response"] for row in (SAMPLE, other)]
+    response = client.post("/predict/batch", json={"records": [SAMPLE, other]})
+    assert response.status_code == 200
+    assert response.json()["responses"] == single
+
+
+def test_predict_batch_columns(client):
+    """Test the columnar batch payload"""
+    columns = {name: [value, value] for name, value in SAMPLE.items()}
+    response = client.post("/predict/batch", json={"columns": columns})
+    assert response.status_code == 200
+    assert len(response.json()["responses"]) == 2
+
+
+def test_predict_batch_rejects_ragged_columns(client):
+    """Test that columns of different lengths are rejected"""
+    columns = {name: [value] for name, value in SAMPLE.items()}
+    columns["age"] = [1.0, 2.0]
+    response = client.post("/predict/batch", json={"columns": columns})
+    assert response.status_code == 422
+
+
+def test_predict_batch_too_large(client, monkeypatch):
+    """Test the max batch size limit"""
+    import main
+    monkeypatch.setattr(main, "MAX_BATCH_SIZE", 1)
+    response = client.post("/predict/batch", json={"records": [SAMPLE, SAMPLE]})
+    assert response.status_code == 413
+
+
+def test_micro_batcher_groups_concurrent_rows():
+    """Test that concurrent submissions are scored in one batch, each getting its own result"""
+    import asyncio
+    import numpy as np
+    from batching import MicroBatcher
+
+    calls = []
+
+    def fake_predict(X):
+        calls.append(len(X))
+        return X[:, 0] * 2
+
+    async def scenario():
+        batcher = MicroBatcher(fake_predict, max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit([float(i)] * 10) for i in range(5)))
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert calls == [5]
+    assert stats["batches"] == 1 and stats["rows"] == 5
+    assert stats["queue_depth"] == 0
+
+
+def test_metrics_endpoint(client):
+    """Test that /metrics reports batching as disabled by default and the worker memory"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.json()["batching"] is None
+    assert response.json()["process"]["peak_rss_bytes"] > 0
+
+
+def test_compiled_tree_matches_sklearn(tmp_path):
+    """Test that the compiled engine predicts exactly like the sklearn tree"""
+    import joblib
+    import numpy as np
+    from data import load_data
+    from tree_engine import CompiledTree, export_tree
+
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledTree.load(export_tree(model, str(tmp_path / "tree")))
+    assert not compiled.threshold.flags.writeable
+
+    X, _ = load_data()
+    noise = np.random.default_rng(0).normal(scale=0.05, size=(5000, X.shape[1]))
+    for data in (X, noise, X[:1]):
+        assert np.array_equal(compiled.predict(data), model.predict(data))
+
+
+def test_export_tree_replaces_previous_arrays(tmp_path):
+    """Test that re-exporting swaps the manifest and removes stale array files"""
+    import joblib
+    import numpy as np
+    from tree_engine import CompiledTree, export_tree
+
+    model = joblib.load(MODEL_PATH)
+    directory = str(tmp_path / "tree")
+    export_tree(model, directory)
+    stale = tmp_path / "tree" / "threshold-000000000000.npy"
+    np.save(stale, np.zeros(1))
+    export_tree(model, directory)
+    assert not stale.exists()
+    assert CompiledTree.load(directory).predict(np.zeros((1, 10))).shape == (1,)
+
+
+def test_compiled_tree_rejects_wrong_shape():
+    """Test the input shape check of the compiled engine"""
+    import numpy as np
+    from predict import TREE_PATH
+    from tree_engine import CompiledTree
+
+    with pytest.raises(ValueError):
+        CompiledTree.load(TREE_PATH).predict(np.zeros((1, 3)))
+
+
+def test_prediction_cache_lru_ttl_and_invalidation(monkeypatch):
+    """Test eviction, expiry and model-version invalidation of the prediction cache"""
+    import cache as cache_module
+    from cache import PredictionCache
+
+    now = [0.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=2, ttl=10)
+    a, b, c = (cache.make_key([float(i)] * 10) for i in range(3))
+
+    cache.put(a, 1.0, "v1")
+    cache.put(b, 2.0, "v1")
+    assert cache.get(a, "v1") == 1.0
+    cache.put(c, 3.0, "v1")
+    assert cache.get(b, "v1") is None
+    assert cache.evictions == 1
+
+    now[0] = 11.0
+    assert cache.get(a, "v1") is None
+    assert cache.expirations == 1
+
+    cache.put(a, 1.0, "v1")
+    assert cache.get(a, "v2") is None
+    assert cache.invalidations == 1
+    assert cache.make_key([-0.0] * 10) == cache.make_key([0.0] * 10)
+
+
+def test_predict_served_from_cache(client):
+    """Test that a repeated payload is a cache hit"""
+    import main
+    main.cache.clear()
+    hits = main.cache.hits
+    first = client.post("/predict", json=SAMPLE).json()
+    second = client.post("/predict", json=SAMPLE).json()
+    assert first == second
+    assert main.cache.hits == hits + 1
+    assert client.get("/metrics").json()["cache"]["hits"] == hits + 1
+
+
+def test_executor_modes_match_inline():
+    """Test that thread and process pools return the same predictions as inline inference"""
+    import asyncio
+    import numpy as np
+    from executor import InferenceExecutor
+    from predict import predict_data
+
+    X = np.random.default_rng(1).normal(scale=0.05, size=(20, 10))
+
+    async def scenario(mode):
+        executor = InferenceExecutor(mode, workers=2, max_queue=2)
+        executor.start()
+        try:
+            return await executor.run(X)
+        finally:
+            executor.shutdown()
+
+    expected = predict_data(X)
+    for mode in ("thread", "process"):
+        assert np.array_equal(asyncio.run(scenario(mode)), expected)
+
+
+def test_predict_returns_503_when_saturated(client, monkeypatch):
+    """Test that a saturated executor turns into 503 instead of queueing forever"""
+    import main
+    main.cache.clear()
+    monkeypatch.setattr(main.executor, "_in_flight", main.executor.workers + main.executor.max_queue)
+    response = client.post("/predict", json=SAMPLE)
+    assert response.status_code == 503
+    assert client.get("/metrics").json()["executor"]["rejected"] >= 1
+
+
+def test_readiness(client):
+    """Test that /ready reports the warmed-up model and the startup breakdown"""
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["model_version"] == registry.version
+    assert set(data["startup_ms"]) == {"imports", "model_load", "warmup", "total"}
+
+
+def test_not_ready_outside_lifespan():
+    """Test that /ready answers 503 before startup has run"""
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+
+
+def _csv_body(rows):
+    header = ",".join(SAMPLE)
+    return header + "\n" + "".join(",".join(str(v) for v in row.values()) + "\n" for row in rows)
+
+
+def test_predict_stream_csv_matches_batch(client):
+    """Test that streamed CSV scoring returns one prediction per row in input order"""
+    rows = [{name: value * (1 + i / 10) for name, value in SAMPLE.items()} for i in range(25)]
+    expected = client.post("/predict/batch", json={"records": rows}).json()["responses"]
+    response = client.post("/predict/stream?chunk_size=7", content=_csv_body(rows), headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "prediction"
+    assert [float(v) for v in lines[1:]] == expected
+
+
+def test_predict_stream_ndjson(client):
+    """Test streamed NDJSON scoring"""
+    import json
+    body = "".join(json.dumps(SAMPLE) + "\n" for _ in range(3))
+    response = client.post("/predict/stream", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert [list(json.loads(line)) for line in response.text.splitlines()] == [["prediction"]] * 3
+
+
+def test_predict_stream_body_in_several_chunks(client):
+    """Test that a body uploaded in pieces that split lines is scored line by line"""
+    import json
+    rows = [{name: value * (1 + i / 10) for name, value in SAMPLE.items()} for i in range(40)]
+    expected = client.post("/predict/batch", json={"records": rows}).json()["responses"]
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+    def pieces():
+        for start in range(0, len(body), 37):
+            yield body[start:start + 37]
+
+    response = client.post("/predict/stream?chunk_size=9", content=pieces(),
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert [json.loads(line)["prediction"] for line in response.text.splitlines()] == expected
+
+
+def test_predict_stream_rejects_bad_header(client):
+    """Test that a CSV without the feature columns is rejected before streaming starts"""
+    response = client.post("/predict/stream", content="a,b\n1,2\n", headers={"content-type": "text/csv"})
+    assert response.status_code == 400
+
+
+def test_score_file_parses_split_lines():
+    """Test that the CLI scorer handles lines split across read blocks"""
+    import io
+    from bulk import score_file
+    from main import FEATURES
+    from predict import predict_data
+
+    rows = [SAMPLE] * 5
+    out = io.BytesIO()
+    n_rows = score_file(io.BytesIO(_csv_body(rows).encode()), out, "csv", FEATURES, predict_data,
+                        chunk_size=2, block_size=7)
+    assert n_rows == 5
+    assert len(out.getvalue().splitlines()) == 6
@@ -1,6 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from bisect import bisect_right
+import json
 
 import uvicorn
 
@@ -9,6 +12,14 @@ app = FastAPI()
 # In-memory storage for demo purposes
 tasks = {}
 task_id_counter = 1
+# Task ids in ascending order, for seeking to a pagination cursor by bisection.
+# Ids of deleted tasks are skipped when listing and dropped when the list is rebuilt.
+task_ids = []
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Tasks serialized per chunk of an NDJSON stream
+NDJSON_BATCH = 500
 
 
 class Task(BaseModel):
@@ -34,13 +45,68 @@ def create_task(task: Task):
     global task_id_counter
     task_id = task_id_counter
     tasks[task_id] = task.dict()
+    task_ids.append(task_id)
     task_id_counter += 1
     return {"id": task_id, **tasks[task_id]}
 
 
+def cursor_index():
+    """Return the ascending task ids, rebuilt when they miss tasks or are mostly deleted ids"""
+    global task_ids
+    if len(task_ids) < len(tasks) or len(task_ids) > 2 * len(tasks) + 1024:
+        # A new list rather than an in-place update, so running streams keep theirs
+        task_ids = sorted(tasks)
+    return task_ids
+
+
+def iter_tasks(after: Optional[int] = None):
+    """Yield tasks in id order, starting after a task id"""
+    ids = cursor_index()
+    start = 0 if after is None else bisect_right(ids, after)
+    for i in range(start, len(ids)):
+        task = tasks.get(ids[i])
+        if task is not None:
+            yield {"id": ids[i], **task}
+
+
+def ndjson_stream(items):
+    """Serialize tasks as NDJSON lines, a batch per chunk, so memory does not grow with the task count"""
+    batch = []
+    for item in items:
+        batch.append(json.dumps(item))
+        if len(batch) == NDJSON_BATCH:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
 @app.get("/tasks", response_model=List[TaskResponse])
-def get_tasks():
-    return [{"id": tid, **task} for tid, task in tasks.items()]
+def get_tasks(response: Response, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+              after: Optional[int] = None, format: str = Query("json", pattern="^(json|ndjson)$")):
+    """
+    List tasks. With limit or after, return one page in id order; the id to pass as
+    after for the next page is sent in the X-Next-Cursor header. format=ndjson streams
+    one task per line.
+    """
+    headers = {}
+    if limit is not None or after is not None:
+        limit = limit or DEFAULT_PAGE_SIZE
+        items = []
+        for item in iter_tasks(after):
+            if len(items) == limit:
+                headers["X-Next-Cursor"] = str(items[-1]["id"])
+                break
+            items.append(item)
+    elif format == "ndjson":
+        items = iter_tasks()
+    else:
+        return [{"id": tid, **task} for tid, task in tasks.items()]
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_stream(items), media_type="application/x-ndjson", headers=headers)
+    response.headers.update(headers)
+    return items
 
 
 @app.get("/tasks/{task_id}", response_model=TaskResponse)
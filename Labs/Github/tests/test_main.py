@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from main import app, tasks, task_id_counter
@@ -12,6 +13,7 @@ def reset_data():
     # Reset the counter
     import main
     main.task_id_counter = 1
+    main.task_ids = []
     yield
 
 
@@ -199,4 +201,46 @@ def test_update_task_not_found_updated():
         "title": "Test",
         "description": "Test"
     })
-    assert response.status_code != 200
\ No newline at end of file
+    assert response.status_code != 200
+
+
+def test_get_tasks_paginated():
+    """Test walking the task list page by page with limit and after"""
+    for i in range(5):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "Paged"})
+    client.delete("/tasks/3")
+
+    first = client.get("/tasks", params={"limit": 2})
+    assert first.status_code == 200
+    assert [t["id"] for t in first.json()] == [1, 2]
+    cursor = first.headers["x-next-cursor"]
+
+    second = client.get("/tasks", params={"limit": 2, "after": cursor})
+    assert [t["id"] for t in second.json()] == [4, 5]
+    assert "x-next-cursor" not in second.headers
+
+
+def test_get_tasks_cursor_after_deleted_task():
+    """Test that a cursor stays valid after its task is deleted"""
+    for i in range(4):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "Paged"})
+    client.delete("/tasks/2")
+    response = client.get("/tasks", params={"after": 2})
+    assert [t["id"] for t in response.json()] == [3, 4]
+
+
+def test_get_tasks_ndjson():
+    """Test streaming tasks as newline-delimited JSON"""
+    for i in range(3):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "Streamed"})
+    response = client.get("/tasks", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [t["title"] for t in lines] == ["Task 0", "Task 1", "Task 2"]
+
+
+def test_get_tasks_invalid_page_parameters():
+    """Test that out-of-range limits and unknown formats are rejected"""
+    assert client.get("/tasks", params={"limit": 0}).status_code == 422
+    assert client.get("/tasks", params={"format": "xml"}).status_code == 422
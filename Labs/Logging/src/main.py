@@ -1,6 +1,10 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from bisect import bisect_right
+import itertools
+import threading
 import uvicorn
 import logging
 
@@ -39,15 +43,70 @@ albums = [
     Album(id="3", title="Hurry Up Tomorrow", artist="Weeknd", price=19.99),
 ]
 
+# Cursor of each album, parallel to albums: insertion sequence numbers, ascending in list
+# order and never reused, so they stay valid cursors when albums are deleted or ids repeat
+_album_counter = itertools.count()
+album_seqs = [next(_album_counter) for _ in albums]
+# Held while albums and album_seqs change together, and while NDJSON streams (which run in
+# the threadpool) read a pair from them
+albums_lock = threading.Lock()
+
 logger.info("Albums API initialized with %d albums", len(albums))
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Albums serialized per chunk of an NDJSON stream
+NDJSON_BATCH = 500
+
+def iter_albums(after: Optional[int] = None):
+    """Yield (cursor, album) pairs in list order, starting after a cursor"""
+    cursor = -1 if after is None else after
+    while True:
+        # Seek by cursor for every album, since the lists can change between two yields
+        with albums_lock:
+            i = bisect_right(album_seqs, cursor)
+            if i >= len(album_seqs):
+                return
+            cursor, album = album_seqs[i], albums[i]
+        yield cursor, album
+
+def ndjson_stream(items):
+    """Serialize albums as NDJSON lines, a batch per chunk, without copying the list"""
+    batch = []
+    count = 0
+    for album in items:
+        batch.append(album.model_dump_json())
+        count += 1
+        if len(batch) == NDJSON_BATCH:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+    logger.info("GET /albums - Streamed %d albums", count)
+
 # GET /albums - Get all albums
 @app.get("/albums", response_model=List[Album])
-async def get_albums():
-    """Get all albums"""
-    logger.debug("Fetching all albums from the collection")
-    logger.info("GET /albums - Returning %d albums", len(albums))
-    return albums
+async def get_albums(response: Response, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                     after: Optional[int] = None, format: str = Query("json", pattern="^(json|ndjson)$")):
+    """Get all albums, or one page of them after the cursor `after`"""
+    logger.debug("Fetching albums from the collection (limit=%s, after=%s, format=%s)", limit, after, format)
+    pairs = iter_albums(after)
+    headers = {}
+    if limit is not None or after is not None:
+        limit = limit or DEFAULT_PAGE_SIZE
+        page = list(itertools.islice(pairs, limit + 1))
+        if len(page) > limit:
+            headers["X-Next-Cursor"] = str(page[limit - 1][0])
+        items = [album for _, album in page[:limit]]
+    else:
+        items = (album for _, album in pairs) if format == "ndjson" else albums
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_stream(items), media_type="application/x-ndjson", headers=headers)
+
+    response.headers.update(headers)
+    logger.info("GET /albums - Returning %d albums", len(items))
+    return items
 
 # POST /albums - Create a new album
 @app.post("/albums", response_model=Album, status_code=201)
@@ -60,7 +119,9 @@ async def post_albums(album: Album):
         if existing_album.id == album.id:
             logger.warning("Duplicate album ID detected: %s. Overwriting existing album.", album.id)
     
-    albums.append(album)
+    with albums_lock:
+        albums.append(album)
+        album_seqs.append(next(_album_counter))
     logger.info("POST /albums - Successfully added album: %s by %s", album.title, album.artist)
     return album
 
@@ -117,7 +178,9 @@ async def delete_album(id: str):
     
     for i, album in enumerate(albums):
         if album.id == id:
-            deleted_album = albums.pop(i)
+            with albums_lock:
+                deleted_album = albums.pop(i)
+                album_seqs.pop(i)
             logger.info("DELETE /albums/%s - Successfully deleted album: %s", id, deleted_album.title)
             return {"message": "album deleted successfully"}
     
@@ -1,7 +1,8 @@
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 from datetime import datetime, timedelta
-from src.lab import load_data, data_preprocessing, build_save_model, load_model_evaluate
+from src.lab import (load_data, data_preprocessing, build_param_grid, train_depth_group,
+                     select_best_model, load_model_evaluate, update_model_incremental, PARTITION_DIR)
 
 default_args = {
     'owner': 'varun',
@@ -15,6 +16,11 @@ with DAG(
     default_args=default_args,
     description='ML pipeline for predicting customer churn using Random Forest',
     catchup=False,
+    # Hyperparameter grid; override per run from the trigger form or `airflow dags trigger --conf`
+    params={
+        'n_estimators': [50, 100, 200],
+        'max_depth': [5, 10, 15],
+    },
 ) as dag:
 
     load_data_task = PythonOperator(
@@ -28,19 +34,76 @@ with DAG(
         op_args=[load_data_task.output],
     )
 
-    build_save_model_task = PythonOperator(
+    param_grid_task = PythonOperator(
+        task_id='build_param_grid',
+        python_callable=build_param_grid,
+        op_args=[data_preprocessing_task.output],
+    )
+
+    # One mapped task instance per max_depth, spread across the available workers
+    train_model_task = PythonOperator.partial(
         task_id='train_random_forest_model',
-        python_callable=build_save_model,
-        op_args=[data_preprocessing_task.output, "churn_model.pkl"],
+        python_callable=train_depth_group,
+    ).expand(op_kwargs=param_grid_task.output)
+
+    select_best_model_task = PythonOperator(
+        task_id='select_best_model',
+        python_callable=select_best_model,
+        op_args=[train_model_task.output, data_preprocessing_task.output, "churn_model.pkg"],
     )
 
     evaluate_model_task = PythonOperator(
         task_id='evaluate_model_performance',
         python_callable=load_model_evaluate,
-        op_args=["churn_model.pkl", build_save_model_task.output, data_preprocessing_task.output],
+        op_args=["churn_model.pkg", select_best_model_task.output, data_preprocessing_task.output],
+    )
+
+    load_data_task >> data_preprocessing_task >> param_grid_task >> train_model_task >> select_best_model_task >> evaluate_model_task
+
+# Daily retraining on the partitions that arrived since the last run; the cost of a run
+# follows the size of the new data instead of the whole history
+with DAG(
+    'Customer_Churn_Incremental_Pipeline',
+    default_args=default_args,
+    description='Incremental churn model updates from new customer partitions',
+    schedule='@daily',
+    catchup=False,
+    max_active_runs=1,
+) as incremental_dag:
+
+    load_partitions_task = PythonOperator(
+        task_id='load_new_partitions',
+        python_callable=load_data,
+        op_kwargs={'data_path': PARTITION_DIR, 'incremental': True},
+    )
+
+    # Skip the rest of the run when no new partition arrived
+    has_new_data_task = ShortCircuitOperator(
+        task_id='has_new_data',
+        python_callable=lambda data_ref: data_ref['rows'] > 0,
+        op_args=[load_partitions_task.output],
+    )
+
+    incremental_preprocessing_task = PythonOperator(
+        task_id='update_scaler_and_features',
+        python_callable=data_preprocessing,
+        op_args=[load_partitions_task.output],
+        op_kwargs={'incremental': True},
+    )
+
+    update_model_task = PythonOperator(
+        task_id='add_trees_to_forest',
+        python_callable=update_model_incremental,
+        op_args=[incremental_preprocessing_task.output, "churn_model_incremental.pkg"],
+    )
+
+    incremental_evaluate_task = PythonOperator(
+        task_id='evaluate_updated_model',
+        python_callable=load_model_evaluate,
+        op_args=["churn_model_incremental.pkg", update_model_task.output, incremental_preprocessing_task.output],
     )
 
-    load_data_task >> data_preprocessing_task >> build_save_model_task >> evaluate_model_task
+    load_partitions_task >> has_new_data_task >> incremental_preprocessing_task >> update_model_task >> incremental_evaluate_task
 
 if __name__ == "__main__":
     dag.test()
\ No newline at end of file
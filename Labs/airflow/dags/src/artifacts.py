@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts")
+SUFFIXES = {"frame": ".parquet", "object": ".pkl", "file": ".bin"}
+
+
+class ArtifactStore:
+    """
+    Content-addressed artifact store on the local filesystem.
+    DataFrames are stored as Parquet and arrays as .npy files, both named by the hash of
+    their content. Pipeline stages exchange only the small JSON-safe references returned
+    by the put_* methods, so XCom never carries the data itself.
+    Args:
+        root (str): Directory holding the artifacts. Defaults to $CHURN_ARTIFACT_ROOT or dags/artifacts.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get("CHURN_ARTIFACT_ROOT", DEFAULT_ROOT)
+        os.makedirs(self.root, exist_ok=True)
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def put_frame(self, df):
+        """
+        Store a DataFrame as Parquet.
+        Args:
+            df (pandas.DataFrame): Frame to store.
+        Returns:
+            dict: Reference to the stored frame.
+        """
+        key = self._write(lambda f: df.to_parquet(f, index=False), ".parquet")
+        return {"kind": "frame", "key": key, "rows": len(df), "columns": list(df.columns)}
+
+    def put_frame_chunks(self, chunks):
+        """
+        Store a DataFrame given as a sequence of chunks, writing one Parquet row group per
+        chunk so that only one chunk is held in memory at a time.
+        Args:
+            chunks (iterable): DataFrames with identical columns and dtypes.
+        Returns:
+            dict: Reference to the stored frame.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        summary = {"rows": 0, "columns": []}
+
+        def dump(f):
+            writer = None
+            schema = None
+            for chunk in chunks:
+                if writer is None:
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    # Chunks have different category sets; give every dictionary the same index width
+                    for i, field in enumerate(schema):
+                        if pa.types.is_dictionary(field.type):
+                            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+                    writer = pq.ParquetWriter(f, schema)
+                    summary["columns"] = list(chunk.columns)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                summary["rows"] += len(chunk)
+            if writer is None:
+                pd.DataFrame().to_parquet(f, index=False)
+            else:
+                writer.close()
+
+        key = self._write(dump, ".parquet")
+        return {"kind": "frame", "key": key, "rows": summary["rows"], "columns": summary["columns"]}
+
+    def get_frame(self, ref, columns=None):
+        """
+        Load a stored DataFrame.
+        Args:
+            ref (dict): Reference returned by put_frame.
+            columns (list): Only read these columns.
+        Returns:
+            pandas.DataFrame: The stored frame.
+        """
+        path = self._path(ref["key"], ".parquet")
+        self.bytes_read += os.path.getsize(path)
+        return pd.read_parquet(path, columns=columns)
+
+    def put_arrays(self, arrays):
+        """
+        Store a dict of NumPy arrays, one .npy file per array.
+        Args:
+            arrays (dict): Array name to numpy.ndarray.
+        Returns:
+            dict: Reference to the stored arrays.
+        """
+        members = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            key = self._write(lambda f: np.save(f, array, allow_pickle=False), ".npy")
+            members[name] = {"key": key, "shape": list(array.shape), "dtype": str(array.dtype)}
+        key = hashlib.sha256(json.dumps(members, sort_keys=True).encode()).hexdigest()
+        return {"kind": "arrays", "key": key, "arrays": members}
+
+    def get_arrays(self, ref, names=None, mmap=True):
+        """
+        Load stored arrays, memory-mapped read-only by default.
+        Args:
+            ref (dict): Reference returned by put_arrays.
+            names (list): Only load these arrays.
+            mmap (bool): Memory-map the files instead of reading them into memory.
+        Returns:
+            dict: Array name to numpy.ndarray.
+        """
+        arrays = {}
+        for name in names or ref["arrays"]:
+            path = self._path(ref["arrays"][name]["key"], ".npy")
+            self.bytes_read += os.path.getsize(path)
+            arrays[name] = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        return arrays
+
+    def put_object(self, obj):
+        """
+        Store a small Python object (e.g. a fitted scaler) as a pickle.
+        Args:
+            obj: Picklable object.
+        Returns:
+            dict: Reference to the stored object.
+        """
+        key = self._write(lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL), ".pkl")
+        return {"kind": "object", "key": key}
+
+    def get_object(self, ref):
+        """
+        Load a stored object.
+        Args:
+            ref (dict): Reference returned by put_object.
+        Returns:
+            The stored object.
+        """
+        path = self._path(ref["key"], ".pkl")
+        self.bytes_read += os.path.getsize(path)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def put_file(self, path):
+        """
+        Store a copy of an existing file.
+        Args:
+            path (str): File to copy into the store.
+        Returns:
+            dict: Reference to the stored file.
+        """
+        def copy(f):
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, f)
+        return {"kind": "file", "key": self._write(copy, ".bin")}
+
+    def get_file(self, ref, path):
+        """
+        Copy a stored file to a destination path, replacing it atomically.
+        Args:
+            ref (dict): Reference returned by put_file.
+            path (str): Destination path.
+        """
+        src = self._path(ref["key"], ".bin")
+        self.bytes_read += os.path.getsize(src)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, path)
+
+    def exists(self, ref):
+        """
+        Check that every artifact a reference points to is still in the store.
+        Args:
+            ref (dict): Any reference returned by a put_* method.
+        Returns:
+            bool: True if all files are present.
+        """
+        if ref["kind"] == "arrays":
+            return all(os.path.exists(self._path(member["key"], ".npy")) for member in ref["arrays"].values())
+        return os.path.exists(self._path(ref["key"], SUFFIXES[ref["kind"]]))
+
+    def size(self, ref):
+        """
+        Return the bytes on disk of the artifacts a reference points to.
+        Args:
+            ref (dict): Any reference returned by a put_* method.
+        Returns:
+            int: Total size in bytes.
+        """
+        if ref["kind"] == "arrays":
+            return sum(os.path.getsize(self._path(member["key"], ".npy")) for member in ref["arrays"].values())
+        return os.path.getsize(self._path(ref["key"], SUFFIXES[ref["kind"]]))
+
+    def report(self, stage):
+        """
+        Print and return the bytes this store instance wrote and read.
+        Args:
+            stage (str): Name of the pipeline stage, used in the log line.
+        Returns:
+            dict: Byte counters for the stage.
+        """
+        stats = {"stage": stage, "bytes_written": self.bytes_written, "bytes_read": self.bytes_read}
+        print(f"Artifact I/O: {json.dumps(stats)}")
+        return stats
+
+    def _path(self, key, suffix):
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def _write(self, dump, suffix):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                dump(f)
+            digest = hashlib.sha256()
+            with open(tmp_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            key = digest.hexdigest()
+            path = self._path(key, suffix)
+            size = os.path.getsize(tmp_path)
+            if os.path.exists(path):
+                # Identical content is already stored
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                self.bytes_written += size
+            return key
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
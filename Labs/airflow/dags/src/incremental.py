@@ -0,0 +1,102 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+from src.artifacts import ArtifactStore
+
+PARTITION_PATTERN = "*.csv"
+
+
+def state_path(store=None):
+    """
+    Returns the path of the incremental training state in the artifact store.
+    """
+    store = store or ArtifactStore()
+    return os.path.join(store.root, "incremental", "state.json")
+
+
+def read_state(store=None):
+    """
+    Reads the incremental training state left by the last run.
+    Returns:
+        dict: Processed partition names, and references to the current scaler and forest
+        (None before the first run).
+    """
+    path = state_path(store)
+    if not os.path.exists(path):
+        return {"partitions": [], "scaler": None, "forest": None, "runs": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_state(state, store=None):
+    """
+    Replaces the incremental training state atomically.
+    """
+    path = state_path(store)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def partition_files(data_path):
+    """
+    Lists the CSV files behind a data path: the file itself, or the partitions of a
+    directory in name order (date-stamped names sort chronologically).
+    """
+    if os.path.isdir(data_path):
+        return sorted(glob.glob(os.path.join(data_path, PARTITION_PATTERN)))
+    return [data_path]
+
+
+def new_partition_files(data_path, state):
+    """
+    Lists the partitions of a directory that no earlier run has trained on.
+    """
+    seen = set(state["partitions"])
+    return [path for path in partition_files(data_path) if os.path.basename(path) not in seen]
+
+
+def rescale_thresholds(forest, old_scaler, new_scaler):
+    """
+    Moves the split thresholds of a fitted forest from the feature scaling it was trained
+    with to an updated one. Both scalings are affine per feature, so every tree keeps making
+    the same decisions on the raw features after the scaler statistics change.
+    """
+    shift = old_scaler.mean_ - new_scaler.mean_
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        split = tree.feature >= 0
+        feature = tree.feature[split]
+        # threshold is a writable view of the tree's node array
+        tree.threshold[split] = (tree.threshold[split] * old_scaler.scale_[feature] + shift[feature]) \
+            / new_scaler.scale_[feature]
+    return forest
+
+
+def grow_incremental(forest, X_train, y_train, n_new_trees, max_trees):
+    """
+    Adds n_new_trees trees fitted on the new data to a warm-started forest, then drops the
+    oldest trees beyond max_trees so the forest covers a bounded window of recent data.
+    Returns the number of trees dropped.
+    Raises ValueError when the new data does not contain every class: a warm-start fit
+    replaces classes_ with the classes of the new data, which the existing trees do not
+    share. The partitions stay unprocessed, so the next run trains on them together with
+    the partitions that arrive after them.
+    """
+    classes = np.unique(y_train)
+    known = getattr(forest, "classes_", None)
+    if len(classes) < 2 or (known is not None and not np.array_equal(classes, known)):
+        expected = "at least two classes" if known is None else f"classes {known.tolist()}"
+        raise ValueError(f"new training data has classes {classes.tolist()}, expected {expected}")
+    forest.set_params(n_estimators=len(getattr(forest, "estimators_", [])) + n_new_trees)
+    forest.fit(X_train, y_train)
+    dropped = max(0, len(forest.estimators_) - max_trees)
+    if dropped:
+        forest.estimators_ = forest.estimators_[dropped:]
+        forest.set_params(n_estimators=len(forest.estimators_))
+    return dropped
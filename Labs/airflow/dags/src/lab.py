@@ -4,36 +4,104 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+import copy
 import pickle
 import os
-import base64
+import time
+from src.artifacts import ArtifactStore
+from src.stage_cache import cached_stage
+from src.profiling import profiled_stage
+from src.model_package import save_model_package, load_model_package, is_model_package
+from src.incremental import (state_path, read_state, write_state, partition_files,
+                             new_partition_files, rescale_thresholds, grow_incremental)
 
-def load_data():
+DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/file.csv")
+# Daily customer extracts for incremental retraining, one CSV per partition
+PARTITION_DIR = os.path.join(os.path.dirname(__file__), "../data/partitions")
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "model")
+
+
+def model_path(filename):
+    """
+    Returns the path of a saved model file.
     """
-    Loads data from a CSV file, serializes it, and returns the serialized data.
+    return os.path.join(MODEL_DIR, filename)
+
+
+# Columns read from the customer extract and their dtypes. Everything else in the file is
+# skipped. Transaction counts are integers far below 2**24, so float32 holds them exactly
+# (float rather than int because they may be missing); monetary amounts keep float64.
+CUSTOMER_SCHEMA = {
+    'CUST_ID': 'category',
+    'BALANCE': 'float64',
+    'PURCHASES': 'float64',
+    'PURCHASES_TRX': 'float32',
+    'CREDIT_LIMIT': 'float64',
+    'CHURN': 'int8',
+}
+
+
+def _load_data_inputs(args):
+    # The partitions decide what is loaded; in incremental mode so does the list of processed ones
+    files = partition_files(args['data_path'])
+    return files + [state_path()] if args['incremental'] else files
+
+
+@profiled_stage
+@cached_stage(file_inputs=_load_data_inputs)
+def load_data(data_path: str = DATA_PATH, chunksize: int = 100_000, incremental: bool = False):
+    """
+    Loads the needed columns of a CSV file, or of every CSV partition in a directory,
+    chunk by chunk with explicit dtypes, drops incomplete rows and streams the result
+    into the artifact store as Parquet. With incremental, only the partitions that
+    no earlier incremental run trained on are loaded.
     Returns:
-        str: Base64-encoded serialized data (JSON-safe).
+        dict: Reference to the stored DataFrame (JSON-safe), listing the loaded
+        partitions when data_path is a directory.
     """
     print("Loading customer data...")
-    df = pd.read_csv(os.path.join(os.path.dirname(__file__), "../data/file.csv"))
-    
-    # Simulate a churn column if it doesn't exist (for demo purposes)
-    if 'CHURN' not in df.columns:
-        np.random.seed(42)
-        # Higher balance and purchases = lower churn probability
-        churn_prob = 1 / (1 + np.exp(df['BALANCE'].fillna(0) / 5000))
-        df['CHURN'] = (np.random.random(len(df)) < churn_prob).astype(int)
-    
-    serialized_data = pickle.dumps(df)
-    return base64.b64encode(serialized_data).decode("ascii")
+    if incremental:
+        files = new_partition_files(data_path, read_state())
+        print(f"New partitions: {[os.path.basename(path) for path in files]}")
+    else:
+        files = partition_files(data_path)
+
+    # One generator for the whole file draws the same sequence as seeding once
+    # and drawing for all rows at the same time
+    rng = np.random.RandomState(42)
 
-def data_preprocessing(data_b64: str):
+    def chunks():
+        for path in files:
+            header = pd.read_csv(path, nrows=0).columns
+            usecols = [column for column in CUSTOMER_SCHEMA if column in header]
+            dtype = {column: CUSTOMER_SCHEMA[column] for column in usecols}
+            for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+                # Simulate a churn column if it doesn't exist (for demo purposes)
+                if 'CHURN' not in chunk.columns:
+                    # Higher balance and purchases = lower churn probability
+                    churn_prob = 1 / (1 + np.exp(chunk['BALANCE'].fillna(0) / 5000))
+                    chunk['CHURN'] = (rng.random_sample(len(chunk)) < churn_prob).astype(CUSTOMER_SCHEMA['CHURN'])
+                yield chunk.dropna()
+
+    store = ArtifactStore()
+    data_ref = store.put_frame_chunks(chunks())
+    if os.path.isdir(data_path):
+        data_ref['partitions'] = [os.path.basename(path) for path in files]
+    print(f"Loaded {data_ref['rows']} complete rows")
+    store.report("load_data")
+    return data_ref
+
+@profiled_stage
+@cached_stage(file_inputs=lambda args: [state_path()] if args['incremental'] else [])
+def data_preprocessing(data_ref: dict, incremental: bool = False):
     """
-    Deserializes data, performs preprocessing, creates features,
-    and returns base64-encoded pickled train/test data.
+    Loads the stored data, performs preprocessing, creates features,
+    and returns a reference to the stored train/test arrays and scaler.
+    With incremental, the scaler of the last incremental run is updated with the
+    new training rows (running means and variances) instead of being refitted.
     """
-    data_bytes = base64.b64decode(data_b64)
-    df = pickle.loads(data_bytes)
+    store = ArtifactStore()
+    df = store.get_frame(data_ref)
 
     df = df.dropna()
     
@@ -52,102 +120,307 @@ def data_preprocessing(data_b64: str):
     )
 
     # Scale the features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
+    previous_scaler = read_state(store)['scaler'] if incremental else None
+    if previous_scaler:
+        scaler = store.get_object(previous_scaler)
+        scaler.partial_fit(X_train)
+        print(f"Scaler updated to {scaler.n_samples_seen_} samples")
+        X_train_scaled = scaler.transform(X_train)
+    else:
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
 
     # Package everything together
-    preprocessed_data = {
-        'X_train': X_train_scaled,
-        'X_test': X_test_scaled,
-        'y_train': y_train.values,
-        'y_test': y_test.values,
-        'scaler': scaler,
+    preprocessed_ref = {
+        'arrays': store.put_arrays({
+            'X_train': X_train_scaled,
+            'X_test': X_test_scaled,
+            'y_train': y_train.values,
+            'y_test': y_test.values,
+        }),
+        'scaler': store.put_object(scaler),
         'feature_names': feature_columns
     }
+    if incremental:
+        # Committed as processed once the model trained on them is saved
+        preprocessed_ref['partitions'] = data_ref.get('partitions', [])
+    store.report("data_preprocessing")
+    return preprocessed_ref
 
-    serialized_data = pickle.dumps(preprocessed_data)
-    return base64.b64encode(serialized_data).decode("ascii")
 
+N_ESTIMATORS_GRID = [50, 100, 200]
+MAX_DEPTH_GRID = [5, 10, 15]
 
-def build_save_model(data_b64: str, filename: str):
+
+def grow_forest(X_train, y_train, max_depth, n_estimators_grid):
     """
-    Builds a Random Forest model on the preprocessed data and saves it.
-    Returns training metrics (JSON-serializable).
+    Grows one Random Forest with warm start, scoring it at every n_estimators value.
+    With a fixed random_state, the first n trees of a warm-started forest are exactly
+    the trees a forest trained from scratch with n_estimators=n would build, so the
+    largest value costs its own trees only once instead of once per configuration.
+    Returns the fully grown forest and the training results keyed by n_estimators.
+    """
+    rf = RandomForestClassifier(
+        n_estimators=0,
+        max_depth=max_depth,
+        random_state=42,
+        n_jobs=-1,
+        warm_start=True
+    )
+    results = {}
+    elapsed = 0.0
+    for n_estimators in sorted(set(n_estimators_grid)):
+        rf.set_params(n_estimators=n_estimators)
+        start = time.perf_counter()
+        rf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        elapsed += fit_seconds
+        results[n_estimators] = {
+            'n_estimators': n_estimators,
+            'max_depth': max_depth,
+            'train_accuracy': float(rf.score(X_train, y_train)),
+            'fit_seconds': fit_seconds,
+            # Training this configuration from scratch costs every tree built so far
+            'from_scratch_seconds': elapsed,
+        }
+        print(f"  n_estimators={n_estimators}, max_depth={max_depth}: "
+              f"+{fit_seconds:.2f}s, train accuracy {results[n_estimators]['train_accuracy']:.4f}")
+    return rf, results
+
+
+def truncate_forest(rf, n_estimators):
+    """
+    Returns a copy of a fitted forest that keeps only its first n_estimators trees.
+    """
+    truncated = copy.copy(rf)
+    truncated.estimators_ = rf.estimators_[:n_estimators]
+    truncated.n_estimators = n_estimators
+    truncated.warm_start = False
+    return truncated
+
+
+@profiled_stage
+def build_param_grid(data_ref: dict, params: dict = None):
     """
-    data_bytes = base64.b64decode(data_b64)
-    data_dict = pickle.loads(data_bytes)
+    Splits the hyperparameter grid into one training job per max_depth.
+    The grid comes from the DAG params 'n_estimators' and 'max_depth' when set.
+    Returns a list of keyword-argument dicts for train_depth_group.
+    """
+    params = params or {}
+    n_estimators_grid = [int(n) for n in params.get('n_estimators', N_ESTIMATORS_GRID)]
+    max_depth_grid = [int(d) for d in params.get('max_depth', MAX_DEPTH_GRID)]
+    if not n_estimators_grid or not max_depth_grid:
+        raise ValueError(f"empty hyperparameter grid: n_estimators={n_estimators_grid}, max_depth={max_depth_grid}")
+    return [
+        {'data_ref': data_ref, 'max_depth': max_depth, 'n_estimators_grid': n_estimators_grid}
+        for max_depth in max_depth_grid
+    ]
+
+
+@profiled_stage
+@cached_stage()
+def train_depth_group(data_ref: dict, max_depth: int, n_estimators_grid: list):
+    """
+    Trains every n_estimators configuration of one max_depth by warm-start growth
+    and stores the grown forest in the artifact store.
+    Returns the training results and a reference to the forest (JSON-serializable).
+    """
+    store = ArtifactStore()
+    arrays = store.get_arrays(data_ref['arrays'], names=['X_train', 'y_train'])
+
+    forest, scores = grow_forest(arrays['X_train'], arrays['y_train'], max_depth, n_estimators_grid)
+
+    forest_ref = store.put_object(forest)
+    store.report(f"train_depth_group[max_depth={max_depth}]")
+    return {
+        'max_depth': max_depth,
+        'forest': forest_ref,
+        'results': [scores[n_estimators] for n_estimators in n_estimators_grid],
+    }
+
 
-    X_train = data_dict['X_train']
-    y_train = data_dict['y_train']
+@profiled_stage
+@cached_stage(file_outputs=lambda args: [model_path(args['filename'])])
+def select_best_model(candidates: list, data_ref: dict, filename: str, compress: bool = False):
+    """
+    Picks the best configuration across all max_depth groups and saves it as a model
+    package (see model_package.py), zlib-compressed when compress is set.
+    Returns training metrics (JSON-serializable).
+    """
+    store = ArtifactStore()
+    # Skipped or failed mapped tasks leave no candidate behind
+    candidates = [candidate for candidate in candidates if candidate and candidate['results']]
+    if not candidates:
+        raise ValueError("no trained candidates to select from: the grid is empty or every training task was skipped")
+    n_estimators_grid = [r['n_estimators'] for r in candidates[0]['results']]
 
-    # Train Random Forest with different hyperparameters to find best
+    # Same order and tie-breaking as training every configuration from scratch
     results = []
     best_score = 0
-    best_model = None
-    
-    for n_estimators in [50, 100, 200]:
-        for max_depth in [5, 10, 15]:
-            rf = RandomForestClassifier(
-                n_estimators=n_estimators,
-                max_depth=max_depth,
-                random_state=42,
-                n_jobs=-1
-            )
-            rf.fit(X_train, y_train)
-            score = rf.score(X_train, y_train)
-            results.append({
-                'n_estimators': n_estimators,
-                'max_depth': max_depth,
-                'train_accuracy': float(score)
-            })
-            
-            if score > best_score:
-                best_score = score
-                best_model = rf
+    best_config = None
+    for n_estimators in n_estimators_grid:
+        for candidate in candidates:
+            result = next(r for r in candidate['results'] if r['n_estimators'] == n_estimators)
+            results.append(result)
+            if result['train_accuracy'] > best_score:
+                best_score = result['train_accuracy']
+                best_config = (candidate, n_estimators)
+
+    best_model = truncate_forest(store.get_object(best_config[0]['forest']), best_config[1])
 
+    fit_time = sum(r['fit_seconds'] for r in results)
+    from_scratch_time = sum(r['from_scratch_seconds'] for r in results)
+    print(f"Grid fit time: {fit_time:.2f}s (estimated {from_scratch_time:.2f}s from scratch, "
+          f"{from_scratch_time - fit_time:.2f}s saved by warm start)")
     print(f"Best training accuracy: {best_score:.4f}")
 
     # Save the best model
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "model")
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, filename)
-    
-    model_package = {
-        'model': best_model,
-        'scaler': data_dict['scaler'],
-        'feature_names': data_dict['feature_names']
-    }
-    
-    with open(output_path, "wb") as f:
-        pickle.dump(model_package, f)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    save_model_package(
+        model_path(filename),
+        best_model,
+        store.get_object(data_ref['scaler']),
+        data_ref['feature_names'],
+        metrics={
+            'n_estimators': best_config[1],
+            'max_depth': best_config[0]['max_depth'],
+            'train_accuracy': best_score,
+            'grid': results,
+        },
+        compress=compress,
+    )
 
+    store.report("select_best_model")
     return results
 
 
-def load_model_evaluate(filename: str, training_results: list, data_b64: str):
+def build_save_model(data_ref: dict, filename: str, params: dict = None):
+    """
+    Builds a Random Forest model on the preprocessed data and saves it.
+    Runs the whole grid in this process; the DAG fans it out with
+    build_param_grid, train_depth_group and select_best_model instead.
+    Returns training metrics (JSON-serializable).
+    """
+    candidates = [train_depth_group(**job) for job in build_param_grid(data_ref, params)]
+    return select_best_model(candidates, data_ref, filename)
+
+
+INCREMENTAL_NEW_TREES = 50
+INCREMENTAL_MAX_TREES = 300
+INCREMENTAL_MAX_DEPTH = 10
+
+
+@profiled_stage
+def update_model_incremental(data_ref: dict, filename: str, n_new_trees: int = INCREMENTAL_NEW_TREES,
+                             max_trees: int = INCREMENTAL_MAX_TREES, max_depth: int = INCREMENTAL_MAX_DEPTH):
+    """
+    Adds n_new_trees trees trained on the new partitions to the forest of the last
+    incremental run (or starts a new forest), keeping at most max_trees of the most
+    recent trees. The existing trees are moved to the updated feature scaling first.
+    Saves the model package, then records the partitions as processed.
+    Returns training metrics (JSON-serializable), like select_best_model.
     """
-    Loads the saved model and evaluates it on test data.
+    store = ArtifactStore()
+    state = read_state(store)
+    arrays = store.get_arrays(data_ref['arrays'], names=['X_train', 'y_train'])
+    scaler = store.get_object(data_ref['scaler'])
+
+    if state['forest']:
+        forest = rescale_thresholds(store.get_object(state['forest']), store.get_object(state['scaler']), scaler)
+    else:
+        forest = RandomForestClassifier(
+            n_estimators=0,
+            max_depth=max_depth,
+            random_state=42,
+            n_jobs=-1,
+            warm_start=True
+        )
+
+    start = time.perf_counter()
+    dropped = grow_incremental(forest, arrays['X_train'], arrays['y_train'], n_new_trees, max_trees)
+    fit_seconds = time.perf_counter() - start
+    result = {
+        'n_estimators': len(forest.estimators_),
+        'max_depth': forest.max_depth,
+        'train_accuracy': float(forest.score(arrays['X_train'], arrays['y_train'])),
+        'fit_seconds': fit_seconds,
+        'new_trees': n_new_trees,
+        'dropped_trees': dropped,
+        'partitions': data_ref['partitions'],
+    }
+    print(f"Added {n_new_trees} trees on {len(arrays['y_train'])} new rows in {fit_seconds:.2f}s, "
+          f"dropped {dropped}, forest has {result['n_estimators']} trees")
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    save_model_package(model_path(filename), forest, scaler, data_ref['feature_names'],
+                       metrics=result)
+
+    write_state({
+        'partitions': state['partitions'] + data_ref['partitions'],
+        'scaler': data_ref['scaler'],
+        'forest': store.put_object(forest),
+        'runs': state['runs'] + 1,
+    }, store)
+    store.report("update_model_incremental")
+    return [result]
+
+
+def predict_single_pass(model, X_test, y_test, chunk_size=None):
+    """
+    Runs predict_proba once over the test set and derives the predicted labels from it,
+    so every tree is traversed a single time. With chunk_size the test set is scored in
+    slices and the confusion matrix is aggregated per slice, bounding the memory of the
+    per-tree probability arrays.
+    Returns predicted labels, positive-class probabilities and the confusion matrix.
+    """
+    classes = model.classes_
+    n_rows = len(y_test)
+    y_pred = np.empty(n_rows, dtype=classes.dtype)
+    y_pred_proba = np.empty(n_rows, dtype=np.float64)
+    cm = np.zeros((len(classes), len(classes)), dtype=np.int64)
+
+    step = max(1, chunk_size or n_rows)
+    for start in range(0, n_rows, step):
+        stop = min(start + step, n_rows)
+        proba = model.predict_proba(X_test[start:stop])
+        # Same rule as RandomForestClassifier.predict
+        chunk_pred = classes.take(np.argmax(proba, axis=1))
+        y_pred[start:stop] = chunk_pred
+        y_pred_proba[start:stop] = proba[:, 1]
+        cm += confusion_matrix(y_test[start:stop], chunk_pred, labels=classes)
+    return y_pred, y_pred_proba, cm
+
+
+@profiled_stage
+@cached_stage(file_inputs=lambda args: [model_path(args['filename'])])
+def load_model_evaluate(filename: str, training_results: list, data_ref: dict, chunk_size: int = None):
+    """
+    Loads the saved model package (or a legacy pickle) and evaluates it on test data in a
+    single prediction pass, optionally in chunks of chunk_size rows for very large test sets.
     Returns evaluation metrics as a dictionary.
     """
-    output_path = os.path.join(os.path.dirname(__file__), "../model", filename)
-    model_package = pickle.load(open(output_path, "rb"))
+    path = model_path(filename)
+    if is_model_package(path):
+        model_package = load_model_package(path, n_jobs=-1)
+    else:
+        # Models saved before the package format
+        model_package = pickle.load(open(path, "rb"))
     
     model = model_package['model']
     feature_names = model_package['feature_names']
 
     # Get test data
-    data_bytes = base64.b64decode(data_b64)
-    data_dict = pickle.loads(data_bytes)
-    X_test = data_dict['X_test']
-    y_test = data_dict['y_test']
+    store = ArtifactStore()
+    arrays = store.get_arrays(data_ref['arrays'], names=['X_test', 'y_test'])
+    X_test = arrays['X_test']
+    y_test = arrays['y_test']
 
     # Make predictions
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    y_pred, y_pred_proba, cm = predict_single_pass(model, X_test, y_test, chunk_size)
 
     # Calculate metrics
-    test_accuracy = float(model.score(X_test, y_test))
+    test_accuracy = float(np.trace(cm) / cm.sum())
     roc_auc = float(roc_auc_score(y_test, y_pred_proba))
     
     # Get feature importance
@@ -156,9 +429,6 @@ def load_model_evaluate(filename: str, training_results: list, data_b64: str):
         for name, importance in zip(feature_names, model.feature_importances_)
     }
 
-    # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
-    
     print(f"\nTest Accuracy: {test_accuracy:.4f}")
     print(f"ROC AUC Score: {roc_auc:.4f}")
     print(f"\nFeature Importance:")
@@ -167,6 +437,7 @@ def load_model_evaluate(filename: str, training_results: list, data_b64: str):
     
     print(f"\nConfusion Matrix:\n{cm}")
     print(f"\nClassification Report:\n{classification_report(y_test, y_pred)}")
+    store.report("load_model_evaluate")
 
     return {
         'test_accuracy': test_accuracy,
@@ -0,0 +1,129 @@
+import functools
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+from src.artifacts import ArtifactStore
+from src.stage_cache import _find_refs, _jsonable
+
+# Peak RSS of the stages currently running in this process, innermost last
+_peak_stack = []
+
+
+def _rss_kb(field):
+    # VmRSS / VmHWM from /proc; None where procfs is not available
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM, so the peak that follows belongs to this stage
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def payload_summary(value):
+    """
+    Measures what a stage receives or returns.
+    Returns:
+        dict: JSON payload bytes (what XCom carries), bytes of the referenced artifacts
+        and row counts per referenced frame or array.
+    """
+    store = ArtifactStore()
+    rows = {}
+    artifact_bytes = 0
+    seen = set()
+    for ref in _find_refs(value):
+        # The same artifact can be referenced several times, e.g. once per mapped job
+        if ref["key"] in seen or not store.exists(ref):
+            continue
+        seen.add(ref["key"])
+        artifact_bytes += store.size(ref)
+        if ref["kind"] == "frame":
+            rows["frame"] = ref["rows"]
+        elif ref["kind"] == "arrays":
+            for name, member in ref["arrays"].items():
+                rows[name] = member["shape"][0] if member["shape"] else 1
+    return {
+        "payload_bytes": len(json.dumps(value, default=_jsonable).encode()),
+        "artifact_bytes": artifact_bytes,
+        "rows": rows,
+    }
+
+
+def profiled_stage(func):
+    """
+    Records wall time, CPU time, peak RSS and the size of the inputs and outputs of a
+    pipeline stage. The measurements are printed as one JSON line to the task log and,
+    when $CHURN_PROFILE_PATH is set, appended to that file so runs can be compared.
+    Apply it outside cached_stage so that cache hits are measured too.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        inputs = payload_summary(dict(bound.arguments))
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        per_stage_peak = _reset_peak_rss()
+        _peak_stack.append(0)
+        rss_before = _rss_kb("VmRSS")
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            nested_peak = _peak_stack.pop()
+            peak = max(_rss_kb("VmHWM") or _max_rss_kb(), nested_peak)
+            if _peak_stack:
+                # Nested stages reset the high-water mark; hand the peak up to the caller
+                _peak_stack[-1] = max(_peak_stack[-1], peak)
+
+        outputs = payload_summary(result)
+        rss_after = _rss_kb("VmRSS")
+        profile = {
+            "stage": func.__name__,
+            "started_at": started_at,
+            "wall_seconds": round(wall_seconds, 4),
+            "cpu_seconds": round(cpu_seconds, 4),
+            "peak_rss_mb": round(peak / 1024, 1),
+            # Without procfs the peak covers the whole process, not just this stage
+            "peak_rss_scope": "stage" if per_stage_peak else "process",
+            "rss_delta_mb": round((rss_after - rss_before) / 1024, 1) if rss_before is not None else None,
+            "input": inputs,
+            "output": outputs,
+        }
+        print(f"Stage profile: {json.dumps(profile)}")
+
+        metrics_path = os.environ.get("CHURN_PROFILE_PATH")
+        if metrics_path:
+            os.makedirs(os.path.dirname(os.path.abspath(metrics_path)), exist_ok=True)
+            with open(metrics_path, "a") as f:
+                f.write(json.dumps(profile) + "\n")
+        return result
+
+    return wrapper
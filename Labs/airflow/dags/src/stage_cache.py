@@ -0,0 +1,126 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+from collections.abc import Iterable
+
+from src.artifacts import ArtifactStore
+
+
+def file_digest(path):
+    """
+    Hashes the content of a file.
+    Returns the hex SHA-256 digest, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def package_source_digest(directory):
+    """
+    Hashes the source of every Python module in a package directory.
+    Returns the hex SHA-256 digest of the module names and contents.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode() + b"\0")
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(f.read() + b"\0")
+    return digest.hexdigest()
+
+
+def _jsonable(value):
+    # Airflow hands mapped-task outputs over as lazy sequences; fingerprint their content
+    if isinstance(value, Iterable) and not isinstance(value, (str, bytes)):
+        return list(value)
+    return str(value)
+
+
+def _find_refs(value):
+    # Artifact references nested anywhere in a stage output
+    if isinstance(value, dict):
+        if value.get("kind") in ("frame", "arrays", "object", "file") and "key" in value:
+            yield value
+        else:
+            for item in value.values():
+                yield from _find_refs(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _find_refs(item)
+
+
+def cached_stage(file_inputs=None, file_outputs=None, depends_on=()):
+    """
+    Skips a pipeline stage when it already ran on the same inputs with the same code.
+    The fingerprint of a call combines the stage's arguments (artifact references are
+    content hashes, so they identify the data), the content of any input files, and the
+    source of every module in the stage's package, so editing a helper or a constant the
+    stage uses (a schema, the model package format) invalidates it. A matching entry whose artifacts are still in the
+    store is returned without running the stage; files the stage writes are restored from
+    the store. Set CHURN_STAGE_CACHE=0 to always run.
+    Args:
+        file_inputs (callable): Maps the bound arguments to paths of files the stage reads.
+        file_outputs (callable): Maps the bound arguments to paths of files the stage writes.
+        depends_on (tuple): Functions outside the stage's package whose source also invalidates the cache.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        package_dir = os.path.dirname(os.path.abspath(inspect.getsourcefile(func)))
+        external_source = "".join(inspect.getsource(f) for f in depends_on)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if os.environ.get("CHURN_STAGE_CACHE", "1") == "0":
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            inputs = file_inputs(arguments) if file_inputs else []
+            outputs = file_outputs(arguments) if file_outputs else []
+
+            fingerprint = hashlib.sha256(json.dumps({
+                "stage": func.__qualname__,
+                # Hashed on every call: a few small files, and an edit is picked up without a restart
+                "source": package_source_digest(package_dir),
+                "external_source": external_source,
+                "arguments": arguments,
+                "files": {path: file_digest(path) for path in inputs},
+            }, sort_keys=True, default=_jsonable).encode()).hexdigest()
+
+            store = ArtifactStore()
+            entry_path = os.path.join(store.root, "stage_cache", fingerprint + ".json")
+            if os.path.exists(entry_path):
+                with open(entry_path) as f:
+                    entry = json.load(f)
+                refs = list(_find_refs(entry["result"])) + list(entry["files"].values())
+                if all(store.exists(ref) for ref in refs):
+                    for path, ref in entry["files"].items():
+                        if file_digest(path) != ref["key"]:
+                            store.get_file(ref, path)
+                    print(f"Stage cache hit: {func.__name__} ({fingerprint[:12]})")
+                    return entry["result"]
+
+            print(f"Stage cache miss: {func.__name__} ({fingerprint[:12]})")
+            result = func(*args, **kwargs)
+            entry = {
+                "stage": func.__name__,
+                "result": result,
+                "files": {path: store.put_file(path) for path in outputs},
+            }
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            tmp_path = entry_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, entry_path)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.artifacts import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty store in a temporary directory"""
+    return ArtifactStore(str(tmp_path / "artifacts"))
+
+
+@pytest.fixture
+def frame():
+    """A frame with the dtypes of the customer extract"""
+    return pd.DataFrame({
+        'CUST_ID': pd.Categorical(['C1', 'C2', 'C3', 'C4']),
+        'BALANCE': [40.9, 3202.5, 2495.1, 1666.7],
+        'PURCHASES_TRX': np.array([2, 0, 12, 1], dtype=np.float32),
+        'CHURN': np.array([0, 1, 0, 1], dtype=np.int8),
+    })
+
+
+def test_frame_round_trip(store, frame):
+    """Test that a stored frame comes back with its values and dtypes"""
+    ref = store.put_frame(frame)
+    assert ref['rows'] == 4 and ref['columns'] == list(frame.columns)
+    pd.testing.assert_frame_equal(store.get_frame(ref), frame)
+    pd.testing.assert_frame_equal(store.get_frame(ref, columns=['BALANCE']), frame[['BALANCE']])
+
+
+def test_frame_chunks_match_whole_frame(store, frame):
+    """Test that a frame streamed in chunks reads back as the concatenated frame"""
+    ref = store.put_frame_chunks(frame.iloc[i:i + 3] for i in range(0, len(frame), 3))
+    assert ref['rows'] == 4
+    result = store.get_frame(ref)
+    pd.testing.assert_frame_equal(result.astype({'CUST_ID': str}), frame.astype({'CUST_ID': str}))
+
+
+def test_arrays_round_trip_memory_mapped(store):
+    """Test that arrays come back unchanged, memory-mapped read-only by default"""
+    arrays = {'X': np.arange(12, dtype=np.float64).reshape(4, 3), 'y': np.array([0, 1, 1, 0], dtype=np.int8)}
+    ref = store.put_arrays(arrays)
+    assert ref['arrays']['X']['shape'] == [4, 3] and ref['arrays']['y']['dtype'] == 'int8'
+    loaded = store.get_arrays(ref)
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].dtype == array.dtype
+    assert isinstance(loaded['X'], np.memmap) and not loaded['X'].flags.writeable
+    assert list(store.get_arrays(ref, names=['y'])) == ['y']
+    assert not isinstance(store.get_arrays(ref, mmap=False)['X'], np.memmap)
+
+
+def test_object_and_file_round_trip(store, tmp_path):
+    """Test that objects and files come back unchanged"""
+    scaler = StandardScaler().fit(np.arange(10.0).reshape(5, 2))
+    np.testing.assert_array_equal(store.get_object(store.put_object(scaler)).mean_, scaler.mean_)
+
+    source = tmp_path / "model.pkg"
+    source.write_bytes(b"package bytes")
+    ref = store.put_file(str(source))
+    destination = tmp_path / "restored" / "model.pkg"
+    store.get_file(ref, str(destination))
+    assert destination.read_bytes() == b"package bytes"
+
+
+def test_content_addressing(store, frame):
+    """Test that equal content shares one key and one file, and different content does not"""
+    first = store.put_frame(frame)
+    written = store.bytes_written
+    assert store.put_frame(frame.copy())['key'] == first['key']
+    assert store.bytes_written == written
+
+    changed = frame.assign(BALANCE=frame['BALANCE'] + 1)
+    assert store.put_frame(changed)['key'] != first['key']
+    assert store.put_arrays({'a': np.zeros(3)})['key'] == store.put_arrays({'a': np.zeros(3)})['key']
+    assert store.put_arrays({'a': np.zeros(3)})['key'] != store.put_arrays({'a': np.ones(3)})['key']
+
+
+def test_exists_and_size(store, frame):
+    """Test that exists and size follow the files on disk"""
+    ref = store.put_frame(frame)
+    arrays_ref = store.put_arrays({'a': np.zeros(3), 'b': np.ones(5)})
+    path = store._path(ref['key'], '.parquet')
+    assert store.exists(ref) and store.size(ref) == os.path.getsize(path)
+    assert store.size(arrays_ref) == sum(
+        os.path.getsize(store._path(member['key'], '.npy')) for member in arrays_ref['arrays'].values())
+    os.remove(path)
+    assert not store.exists(ref)
+    os.remove(store._path(arrays_ref['arrays']['b']['key'], '.npy'))
+    assert not store.exists(arrays_ref)
@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.incremental import grow_incremental, rescale_thresholds
+
+
+def make_partition(seed, n_rows=1000, shift=0.0):
+    """Raw features and labels of one synthetic partition"""
+    rng = np.random.RandomState(seed)
+    X = rng.normal(loc=shift, scale=1.0 + shift, size=(n_rows, 4))
+    y = (X[:, 0] - X[:, 1] + rng.normal(size=n_rows) > shift).astype(np.int8)
+    return X, y
+
+
+def new_forest():
+    """An empty warm-start forest, as the first incremental run creates it"""
+    return RandomForestClassifier(n_estimators=0, max_depth=6, random_state=42, warm_start=True)
+
+
+def test_rescale_thresholds_keeps_decisions_on_raw_features():
+    """Test that rescaled trees route every raw row to the same leaves as before"""
+    X_old, y_old = make_partition(0)
+    X_new, _ = make_partition(1, shift=3.0)
+    old_scaler = StandardScaler().fit(X_old)
+    forest = new_forest()
+    grow_incremental(forest, old_scaler.transform(X_old), y_old, n_new_trees=10, max_trees=50)
+    original = copy.deepcopy(forest)
+
+    new_scaler = copy.deepcopy(old_scaler).partial_fit(X_new)
+    assert not np.allclose(new_scaler.mean_, old_scaler.mean_)
+    rescale_thresholds(forest, old_scaler, new_scaler)
+
+    X = np.vstack([X_old, X_new, make_partition(2, shift=1.5)[0]])
+    np.testing.assert_array_equal(forest.apply(new_scaler.transform(X)),
+                                  original.apply(old_scaler.transform(X)))
+    np.testing.assert_array_equal(forest.predict_proba(new_scaler.transform(X)),
+                                  original.predict_proba(old_scaler.transform(X)))
+
+
+def test_grow_incremental_keeps_a_bounded_window():
+    """Test that the oldest trees are dropped once the forest exceeds max_trees"""
+    forest = new_forest()
+    for seed in range(3):
+        X, y = make_partition(seed)
+        dropped = grow_incremental(forest, X, y, n_new_trees=10, max_trees=25)
+    assert dropped == 5
+    assert len(forest.estimators_) == forest.n_estimators == 25
+
+
+def test_grow_incremental_rejects_single_class_partition():
+    """Test that a partition missing a class leaves the forest and its classes untouched"""
+    X, y = make_partition(0)
+    forest = new_forest()
+    grow_incremental(forest, X, y, n_new_trees=10, max_trees=50)
+    estimators = list(forest.estimators_)
+
+    X_new, _ = make_partition(1)
+    with pytest.raises(ValueError, match="expected classes"):
+        grow_incremental(forest, X_new, np.zeros(len(X_new), dtype=np.int8), n_new_trees=10, max_trees=50)
+    np.testing.assert_array_equal(forest.classes_, [0, 1])
+    assert forest.estimators_ == estimators
+
+    with pytest.raises(ValueError, match="at least two classes"):
+        grow_incremental(new_forest(), X_new, np.ones(len(X_new), dtype=np.int8), n_new_trees=10, max_trees=50)
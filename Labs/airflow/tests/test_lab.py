@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import confusion_matrix
+from sklearn.preprocessing import StandardScaler
+
+from src import lab
+from src.artifacts import ArtifactStore
+from src.lab import (CUSTOMER_SCHEMA, DATA_PATH, build_param_grid, grow_forest, load_data,
+                     predict_single_pass, select_best_model, train_depth_group, truncate_forest)
+from src.model_package import read_manifest
+
+
+@pytest.fixture(autouse=True)
+def artifact_root(tmp_path, monkeypatch):
+    """Keep artifacts and stage cache entries out of dags/artifacts"""
+    monkeypatch.setenv("CHURN_ARTIFACT_ROOT", str(tmp_path / "artifacts"))
+    return tmp_path / "artifacts"
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """Standardized features and labels of a small synthetic problem"""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(600, 5))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=len(X)) > 0).astype(np.int8)
+    return X, y
+
+
+@pytest.fixture
+def data_ref(training_data):
+    """The synthetic problem stored like data_preprocessing stores its output"""
+    X, y = training_data
+    store = ArtifactStore()
+    scaler = StandardScaler().fit(X[:400])
+    return {
+        'arrays': store.put_arrays({
+            'X_train': scaler.transform(X[:400]),
+            'X_test': scaler.transform(X[400:]),
+            'y_train': y[:400],
+            'y_test': y[400:],
+        }),
+        'scaler': store.put_object(scaler),
+        'feature_names': [f"f{i}" for i in range(5)],
+    }
+
+
+def test_load_data_chunks_match_read_csv():
+    """Test that typed chunked ingest gives the frame a single pd.read_csv would"""
+    expected = pd.read_csv(DATA_PATH, usecols=[column for column in CUSTOMER_SCHEMA if column != 'CHURN'])
+    # The bundled extract has no CHURN column; it is simulated from one generator for the whole file
+    churn_prob = 1 / (1 + np.exp(expected['BALANCE'].fillna(0) / 5000))
+    expected['CHURN'] = np.random.RandomState(42).random_sample(len(expected)) < churn_prob
+    expected = expected.dropna().astype(CUSTOMER_SCHEMA).reset_index(drop=True)
+
+    for chunksize in (1000, 100_000):
+        ref = load_data(DATA_PATH, chunksize=chunksize)
+        assert ref['rows'] == len(expected)
+        result = ArtifactStore().get_frame(ref)[list(expected.columns)]
+        pd.testing.assert_frame_equal(result.astype({'CUST_ID': str}), expected.astype({'CUST_ID': str}))
+        assert dict(result.dtypes.astype(str)) == {column: str(dtype) for column, dtype in CUSTOMER_SCHEMA.items()}
+
+
+def test_warm_start_grid_matches_independent_forests(training_data):
+    """Test that every prefix of the warm-started forest is the forest trained from scratch"""
+    X, y = training_data
+    forest, results = grow_forest(X, y, max_depth=4, n_estimators_grid=[10, 3, 6])
+    assert sorted(results) == [3, 6, 10]
+    for n_estimators, result in results.items():
+        independent = RandomForestClassifier(n_estimators=n_estimators, max_depth=4, random_state=42).fit(X, y)
+        truncated = truncate_forest(forest, n_estimators)
+        np.testing.assert_array_equal(truncated.predict_proba(X), independent.predict_proba(X))
+        assert result['train_accuracy'] == independent.score(X, y)
+    assert len(forest.estimators_) == 10
+
+
+def test_build_param_grid_one_job_per_depth():
+    """Test the default grid and a grid given as DAG params"""
+    jobs = build_param_grid({'key': 'ref'})
+    assert [job['max_depth'] for job in jobs] == lab.MAX_DEPTH_GRID
+    assert all(job['n_estimators_grid'] == lab.N_ESTIMATORS_GRID and job['data_ref'] == {'key': 'ref'}
+               for job in jobs)
+    jobs = build_param_grid({}, {'n_estimators': ['5', 10], 'max_depth': ['3']})
+    assert jobs == [{'data_ref': {}, 'max_depth': 3, 'n_estimators_grid': [5, 10]}]
+
+
+def test_build_param_grid_rejects_empty_grid():
+    """Test that an empty hyperparameter list fails before any training task is mapped"""
+    with pytest.raises(ValueError, match="empty hyperparameter grid"):
+        build_param_grid({}, {'max_depth': []})
+    with pytest.raises(ValueError, match="empty hyperparameter grid"):
+        build_param_grid({}, {'n_estimators': []})
+
+
+def test_select_best_model_rejects_no_candidates():
+    """Test that selection without any trained candidate raises a clear error"""
+    with pytest.raises(ValueError, match="no trained candidates"):
+        select_best_model([], {}, "model.pkg")
+    with pytest.raises(ValueError, match="no trained candidates"):
+        select_best_model([None], {}, "model.pkg")
+
+
+def test_select_best_model_picks_best_of_grid(data_ref, training_data, tmp_path, monkeypatch):
+    """Test that the saved model is the best configuration of independently trained forests"""
+    monkeypatch.setattr(lab, "MODEL_DIR", str(tmp_path / "model"))
+    jobs = build_param_grid(data_ref, {'n_estimators': [3, 8], 'max_depth': [2, 6]})
+    candidates = [train_depth_group(**job) for job in jobs]
+    results = select_best_model(candidates, data_ref, "model.pkg")
+
+    X_train = ArtifactStore().get_arrays(data_ref['arrays'])['X_train']
+    y_train = training_data[1][:400]
+    scores = {}
+    for n_estimators in (3, 8):
+        for max_depth in (2, 6):
+            forest = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42)
+            scores[(n_estimators, max_depth)] = forest.fit(X_train, y_train).score(X_train, y_train)
+    # Grid order, as training every configuration from scratch would report it
+    assert [(r['n_estimators'], r['max_depth']) for r in results] == list(scores)
+    assert [r['train_accuracy'] for r in results] == list(scores.values())
+
+    manifest = read_manifest(lab.model_path("model.pkg"))
+    best = max(scores, key=scores.get)
+    assert (manifest['metrics']['n_estimators'], manifest['metrics']['max_depth']) == best
+    assert manifest['model']['n_estimators'] == best[0]
+
+
+def test_predict_single_pass_matches_separate_passes(training_data):
+    """Test that one predict_proba pass gives predict, predict_proba and the confusion matrix"""
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X[:400], y[:400])
+    X_test, y_test = X[400:], y[400:]
+    expected_pred = model.predict(X_test)
+    for chunk_size in (None, 1, 7, 1000):
+        y_pred, y_pred_proba, cm = predict_single_pass(model, X_test, y_test, chunk_size)
+        np.testing.assert_array_equal(y_pred, expected_pred)
+        np.testing.assert_array_equal(y_pred_proba, model.predict_proba(X_test)[:, 1])
+        np.testing.assert_array_equal(cm, confusion_matrix(y_test, expected_pred))
@@ -0,0 +1,72 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.model_package import load_model_package, save_model_package
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """A small fitted forest and its scaler"""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(2000, 5))
+    y = (X[:, 0] + rng.normal(scale=2.0, size=len(X)) > 0).astype(np.int8)
+    model = RandomForestClassifier(n_estimators=40, max_depth=8, random_state=42).fit(X, y)
+    return model, StandardScaler().fit(X)
+
+
+@pytest.fixture
+def package(fitted, tmp_path):
+    """The fitted forest saved as a model package and loaded back"""
+    model, scaler = fitted
+    path = str(tmp_path / "model.pkg")
+    save_model_package(path, model, scaler, [f"f{i}" for i in range(5)])
+    return load_model_package(path)
+
+
+def test_predict_proba_matches_sklearn(fitted, package):
+    """Test that the package reproduces RandomForestClassifier.predict_proba"""
+    model, _ = fitted
+    X = np.random.RandomState(1).normal(size=(3000, 5))
+    np.testing.assert_array_equal(package["model"].predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(package["model"].predict(X), model.predict(X))
+    np.testing.assert_array_equal(package["model"].classes_, model.classes_)
+    np.testing.assert_array_equal(package["model"].feature_importances_, model.feature_importances_)
+
+
+def test_rebuilt_trees_match_sklearn(fitted, package):
+    """Test that every rebuilt tree has the structure and leaves of the original"""
+    model, _ = fitted
+    forest = package["model"].forest
+    X = np.random.RandomState(2).normal(size=(1000, 5)).astype(np.float32)
+    np.testing.assert_array_equal(forest.apply(X), model.apply(X))
+    for rebuilt, original in zip(forest.estimators_, model.estimators_):
+        assert rebuilt.tree_.node_count == original.tree_.node_count
+        assert rebuilt.tree_.max_depth == original.tree_.max_depth
+
+
+def test_predict_proba_threads_match(fitted, tmp_path):
+    """Test that scoring with several threads gives the single-threaded probabilities"""
+    model, scaler = fitted
+    path = str(tmp_path / "model.pkg")
+    save_model_package(path, model, scaler, [f"f{i}" for i in range(5)])
+    X = np.random.RandomState(3).normal(size=(3000, 5))
+    np.testing.assert_allclose(load_model_package(path, n_jobs=2)["model"].predict_proba(X),
+                               model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_predict_proba_memory_independent_of_tree_count(package):
+    """Test that scoring does not allocate per-tree arrays for every row"""
+    forest = package["model"]
+    X = np.random.RandomState(4).normal(size=(50000, 5))
+    # Rebuild the sklearn trees outside the measurement
+    forest.predict_proba(X[:1])
+    tracemalloc.start()
+    forest.predict_proba(X)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # A (n_trees, n_rows) int64 leaf array alone would be 40 * 50000 * 8 = 16 MB
+    assert peak < 8_000_000
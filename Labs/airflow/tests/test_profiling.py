@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.artifacts import ArtifactStore
+from src.profiling import payload_summary, profiled_stage
+
+
+@profiled_stage
+def allocate(n_rows: int, n_columns: int = 4):
+    """Stores an array of n_rows rows and references it twice"""
+    X = np.ones((n_rows, n_columns))
+    ref = ArtifactStore().put_arrays({'X': X, 'y': X[:, 0]})
+    return {'first': ref, 'again': ref}
+
+
+@profiled_stage
+def outer(n_rows: int):
+    """Runs a nested stage that allocates more than this one"""
+    return allocate(n_rows)
+
+
+@pytest.fixture(autouse=True)
+def profile_path(tmp_path, monkeypatch):
+    """Keep artifacts out of dags/artifacts and collect profiles in a temporary file"""
+    monkeypatch.setenv("CHURN_ARTIFACT_ROOT", str(tmp_path / "artifacts"))
+    path = tmp_path / "profiles" / "stages.jsonl"
+    monkeypatch.setenv("CHURN_PROFILE_PATH", str(path))
+    return path
+
+
+def read_profiles(path):
+    """The profiles appended to a CHURN_PROFILE_PATH file"""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_profile_is_printed_and_appended(profile_path, capsys):
+    """Test that every call prints one profile line and appends it to CHURN_PROFILE_PATH"""
+    allocate(1000)
+    allocate(2000)
+    printed = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Stage profile: ")]
+    profiles = read_profiles(profile_path)
+    assert len(printed) == len(profiles) == 2
+    assert json.loads(printed[0][len("Stage profile: "):]) == profiles[0]
+
+    profile = profiles[1]
+    assert profile['stage'] == 'allocate'
+    assert profile['wall_seconds'] >= 0 and profile['cpu_seconds'] >= 0
+    assert profile['peak_rss_mb'] > 0
+    assert profile['peak_rss_scope'] in ('stage', 'process')
+    assert profile['input'] == {'payload_bytes': len(json.dumps({'n_rows': 2000, 'n_columns': 4})),
+                                'artifact_bytes': 0, 'rows': {}}
+
+
+def test_output_artifacts_counted_once(profile_path):
+    """Test that artifacts referenced several times count once, with their rows"""
+    result = allocate(500)
+    output = read_profiles(profile_path)[0]['output']
+    assert output['artifact_bytes'] == ArtifactStore().size(result['first'])
+    assert output['rows'] == {'X': 500, 'y': 500}
+    assert output == payload_summary(result)
+
+
+def test_nested_stage_peak_reaches_caller(profile_path):
+    """Test that the outer stage reports at least the peak of the stage it ran"""
+    outer(200_000)
+    inner, outer_profile = read_profiles(profile_path)
+    assert (inner['stage'], outer_profile['stage']) == ('allocate', 'outer')
+    # The inner stage resets the high-water mark, so the outer one only sees it handed up
+    assert outer_profile['peak_rss_mb'] >= inner['peak_rss_mb']
+
+
+def test_profile_file_optional(profile_path, monkeypatch):
+    """Test that without CHURN_PROFILE_PATH the stage only prints"""
+    monkeypatch.delenv("CHURN_PROFILE_PATH")
+    allocate(10)
+    assert not profile_path.exists()
@@ -0,0 +1,138 @@
+import importlib.util
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from src.artifacts import ArtifactStore
+from src.stage_cache import cached_stage
+
+STAGE_MODULE = '''
+from src.stage_cache import cached_stage
+
+calls = []
+
+
+@cached_stage()
+def scale(values: list, factor: int):
+    from constants import OFFSET
+    calls.append(values)
+    return [v * factor + OFFSET for v in values]
+'''
+
+
+calls = []
+
+
+@cached_stage(file_inputs=lambda args: [args['path']], file_outputs=lambda args: [args['output']])
+def shout(path: str, output: str, suffix: str = "!"):
+    """Upper-cases a text file into another file and stores the text as a frame"""
+    calls.append(path)
+    with open(path) as f:
+        text = f.read().upper() + suffix
+    with open(output, "w") as f:
+        f.write(text)
+    return {'length': len(text), 'frame': ArtifactStore().put_frame(pd.DataFrame({'text': [text]}))}
+
+
+@pytest.fixture(autouse=True)
+def artifact_root(tmp_path, monkeypatch):
+    """Keep artifacts and stage cache entries out of dags/artifacts"""
+    monkeypatch.setenv("CHURN_ARTIFACT_ROOT", str(tmp_path / "artifacts"))
+    monkeypatch.delenv("CHURN_STAGE_CACHE", raising=False)
+    calls.clear()
+
+
+@pytest.fixture
+def files(tmp_path):
+    """An input text file and the path the stage writes"""
+    source = tmp_path / "input.txt"
+    source.write_text("churn")
+    return str(source), str(tmp_path / "output.txt")
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A package with a cached stage and a constants module next to it"""
+    directory = tmp_path / "stages"
+    directory.mkdir()
+    (directory / "constants.py").write_text("OFFSET = 1\n")
+    (directory / "stage.py").write_text(STAGE_MODULE)
+    monkeypatch.syspath_prepend(str(directory))
+    # Record sys.modules['constants'] as absent, so the module the stage imports is removed afterwards
+    monkeypatch.setitem(sys.modules, "constants", None)
+    monkeypatch.delitem(sys.modules, "constants")
+    spec = importlib.util.spec_from_file_location("stage", directory / "stage.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return directory, module
+
+
+def test_editing_a_constant_invalidates_the_cache(package):
+    """Test that a change to another module of the stage's package reruns the stage"""
+    directory, module = package
+    assert module.scale([1, 2], 3) == [4, 7]
+    assert module.scale([1, 2], 3) == [4, 7]
+    assert len(module.calls) == 1
+
+    (directory / "constants.py").write_text("OFFSET = 10\n")
+    del sys.modules["constants"]
+    assert module.scale([1, 2], 3) == [13, 16]
+    assert len(module.calls) == 2
+
+
+def test_same_inputs_hit(files):
+    """Test that a second call with the same arguments and files returns the stored result"""
+    first = shout(*files)
+    assert shout(*files) == first
+    assert len(calls) == 1
+
+
+def test_changed_argument_or_input_file_miss(files):
+    """Test that a different argument or a changed input file reruns the stage"""
+    path, output = files
+    shout(path, output)
+    assert shout(path, output, suffix="?")['length'] == 6
+    assert len(calls) == 2
+
+    with open(path, "w") as f:
+        f.write("retained")
+    assert shout(path, output)['length'] == 9
+    assert len(calls) == 3
+    with open(output) as f:
+        assert f.read() == "RETAINED!"
+
+
+def test_hit_restores_output_files(files):
+    """Test that a hit puts back an output file that was deleted or overwritten"""
+    path, output = files
+    shout(path, output)
+    os.remove(output)
+    shout(path, output)
+    with open(output) as f:
+        assert f.read() == "CHURN!"
+    with open(output, "w") as f:
+        f.write("stale")
+    shout(path, output)
+    with open(output) as f:
+        assert f.read() == "CHURN!"
+    assert len(calls) == 1
+
+
+def test_missing_artifact_miss(files):
+    """Test that an entry whose artifacts were removed from the store is recomputed"""
+    result = shout(*files)
+    store = ArtifactStore()
+    os.remove(store._path(result['frame']['key'], '.parquet'))
+    assert shout(*files) == result
+    assert len(calls) == 2
+    assert store.exists(result['frame'])
+
+
+def test_cache_disabled(files, monkeypatch):
+    """Test that CHURN_STAGE_CACHE=0 runs the stage every time"""
+    monkeypatch.setenv("CHURN_STAGE_CACHE", "0")
+    shout(*files)
+    shout(*files)
+    assert len(calls) == 2
@@ -0,0 +1,109 @@
+"""
+Catalog-size benchmark for the Albums APIs (Docker and terraform_lab).
+
+Fills the app's album store with N albums and measures the latency of
+GET/PUT/DELETE /albums/{id} on the most recently added album (the worst case for a
+linear scan) through the ASGI transport, for every catalog size. For apps that support
+search (Docker), GET /albums with artist, title and price filters is measured as well.
+
+Usage:
+    python album_store.py                          # Docker app, 1e3 1e5 1e6 albums
+    python album_store.py --apps docker terraform_lab --sizes 1e4 1e5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from load_test import load_module, percentile
+
+APPS = ("docker", "terraform_lab")
+
+# Selective queries against the catalog built by fill()
+SEARCHES = {
+    "GET /albums?artist": {"artist": "Artist 7"},
+    "GET /albums?title": {"title": "12345"},
+    "GET /albums?price": {"min_price": 10.0, "max_price": 10.02},
+}
+
+
+def fill(module, n_albums):
+    """
+    Replace the app's catalog with n_albums albums.
+    Args:
+        module: The imported main.py of the app.
+        n_albums (int): Catalog size.
+    Returns:
+        str: Id of the last album added.
+    """
+    module.albums.clear()
+    for i in range(n_albums):
+        module.albums.add(module.Album(id=str(i), title=f"Album {i}", artist=f"Artist {i % 1000}",
+                                      price=(i % 5000) / 100))
+    return str(n_albums - 1)
+
+
+async def measure(client, method, path, n_requests, body=None, params=None):
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        response = await client.request(method, path, json=body, params=params)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    latencies.sort()
+    return {"p50_ms": 1000 * percentile(latencies, 50), "p95_ms": 1000 * percentile(latencies, 95)}
+
+
+async def bench(name, sizes, n_requests):
+    module = load_module(name)
+    results = []
+    transport = httpx.ASGITransport(app=module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n_albums in sizes:
+            last_id = fill(module, n_albums)
+            update = {"title": "Updated", "artist": "Bench", "price": 1.0}
+            timings = {
+                "GET /albums/{id}": await measure(client, "GET", f"/albums/{last_id}", n_requests),
+                "PUT /albums/{id}": await measure(client, "PUT", f"/albums/{last_id}", n_requests, update),
+            }
+            # Delete and re-add the last album so every request finds it
+            latencies = []
+            for _ in range(n_requests):
+                start = time.perf_counter()
+                response = await client.delete(f"/albums/{last_id}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+                module.albums.add(module.Album(id=last_id, title="Album", artist="Bench", price=9.99))
+            latencies.sort()
+            timings["DELETE /albums/{id}"] = {"p50_ms": 1000 * percentile(latencies, 50),
+                                              "p95_ms": 1000 * percentile(latencies, 95)}
+            if hasattr(module.albums, "search"):
+                for label, params in SEARCHES.items():
+                    timings[label] = await measure(client, "GET", "/albums", n_requests, params=params)
+            for endpoint, timing in timings.items():
+                results.append({"app": name, "albums": n_albums, "endpoint": endpoint, **timing})
+                print(f"{name:<14} albums={n_albums:<9} {endpoint:<22} "
+                      f"p50={timing['p50_ms']:7.3f}ms  p95={timing['p95_ms']:7.3f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark album lookups against catalog size")
+    parser.add_argument("--apps", nargs="+", choices=sorted(APPS), default=["docker"])
+    parser.add_argument("--sizes", nargs="+", type=lambda s: int(float(s)), default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and size")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.apps:
+        results += asyncio.run(bench(name, args.sizes, args.requests))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
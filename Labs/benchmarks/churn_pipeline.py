@@ -0,0 +1,181 @@
+"""
+Synthetic-scale benchmark for the churn pipeline in airflow/dags/src/lab.py.
+
+Generates customer extracts with the same schema as data/file.csv at the requested
+sizes, runs the four pipeline stages (load, preprocess, train, evaluate) outside Airflow
+and reports wall time, CPU time, peak RSS and payload sizes per stage, as recorded by
+the pipeline's own profiled_stage decorator.
+
+Usage:
+    python churn_pipeline.py                                     # 1e4 and 1e5 rows
+    python churn_pipeline.py --rows 1e4 1e5 1e6 1e7 --n-estimators 50 --max-depth 10
+    python churn_pipeline.py --baseline churn_old.json           # fail on wall-time regressions
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+LABS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAGS_DIR = os.path.join(LABS_DIR, "airflow", "dags")
+SOURCE_PATH = os.path.join(DAGS_DIR, "data", "file.csv")
+
+
+def generate_customers(path, n_rows, seed=0, chunk_size=100_000, source_path=SOURCE_PATH):
+    """
+    Write a synthetic customer extract with the columns, dtypes and missing-value rates
+    of the bundled file. Every numeric column is drawn from the empirical distribution of
+    the real column, so feature ranges and the simulated churn rate stay realistic.
+    Args:
+        path (str): Destination CSV.
+        n_rows (int): Number of customers.
+        seed (int): Seed of the generator.
+        chunk_size (int): Rows generated and written at a time.
+        source_path (str): Real extract to sample from.
+    """
+    source = pd.read_csv(source_path)
+    numeric = [column for column in source.columns if column != "CUST_ID"]
+    values = {column: source[column].dropna().to_numpy() for column in numeric}
+    missing = {column: float(source[column].isna().mean()) for column in numeric}
+    rng = np.random.default_rng(seed)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        for start in range(0, n_rows, chunk_size):
+            size = min(chunk_size, n_rows - start)
+            chunk = {"CUST_ID": [f"C{i}" for i in range(10001 + start, 10001 + start + size)]}
+            for column in numeric:
+                column_values = rng.choice(values[column], size=size)
+                if missing[column]:
+                    column_values = np.where(rng.random(size) < missing[column], np.nan, column_values)
+                chunk[column] = column_values
+            pd.DataFrame(chunk, columns=source.columns).to_csv(f, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+
+
+def run_pipeline(data_path, work_dir, params):
+    """
+    Run the four pipeline stages on one extract with caching disabled.
+    Args:
+        data_path (str): Customer CSV.
+        work_dir (str): Directory for the artifact store, the model and the stage profiles.
+        params (dict): Hyperparameter grid, as in the DAG params.
+    Returns:
+        list: One profile dict per stage, in execution order.
+    """
+    profile_path = os.path.join(work_dir, "profile.jsonl")
+    os.environ["CHURN_ARTIFACT_ROOT"] = os.path.join(work_dir, "artifacts")
+    os.environ["CHURN_STAGE_CACHE"] = "0"
+    os.environ["CHURN_PROFILE_PATH"] = profile_path
+
+    if DAGS_DIR not in sys.path:
+        sys.path.insert(0, DAGS_DIR)
+    from src import lab
+    from src.profiling import profiled_stage
+
+    lab.MODEL_DIR = os.path.join(work_dir, "model")
+    # The stages log to stdout for Airflow; keep the benchmark output readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        _run_stages(lab, profiled_stage, data_path, params)
+
+    with open(profile_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _run_stages(lab, profiled_stage, data_path, params):
+    data_ref = lab.load_data(data_path)
+    preprocessed_ref = lab.data_preprocessing(data_ref)
+    # The mapped training tasks and the selection run inside build_save_model; profile it as one stage
+    training_results = profiled_stage(lab.build_save_model)(preprocessed_ref, "churn_model.pkg", params)
+    lab.load_model_evaluate("churn_model.pkg", training_results, preprocessed_ref)
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Compare stage wall times with a previous run.
+    Returns:
+        list: Human-readable descriptions of regressions beyond the tolerance.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["rows"], r["stage"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["rows"], result["stage"]))
+        if previous and result["wall_seconds"] > previous["wall_seconds"] * (1 + tolerance):
+            regressions.append(f"rows={result['rows']} {result['stage']}: "
+                               f"{previous['wall_seconds']:.2f}s -> {result['wall_seconds']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the churn pipeline on synthetic data")
+    parser.add_argument("--rows", nargs="+", type=lambda s: int(float(s)), default=[10_000, 100_000],
+                        help="extract sizes, e.g. 1e4 1e6")
+    parser.add_argument("--n-estimators", nargs="+", type=int, default=[50])
+    parser.add_argument("--max-depth", nargs="+", type=int, default=[10])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep generated extracts here and reuse them across runs")
+    parser.add_argument("--output", default="churn_bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare stage wall times against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative wall-time increase")
+    args = parser.parse_args()
+
+    params = {"n_estimators": args.n_estimators, "max_depth": args.max_depth}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        for n_rows in args.rows:
+            data_path = os.path.join(data_dir, f"customers_{n_rows}_seed{args.seed}.csv")
+            if not os.path.exists(data_path):
+                print(f"Generating {n_rows} rows...")
+                generate_customers(data_path, n_rows, args.seed)
+
+            work_dir = tempfile.mkdtemp(dir=tmp_dir)
+            for profile in run_pipeline(data_path, work_dir, params):
+                # Grid, training and selection run nested in build_save_model and are covered by it
+                if profile["stage"] in ("build_param_grid", "train_depth_group", "select_best_model"):
+                    continue
+                result = {
+                    "rows": n_rows,
+                    "stage": profile["stage"],
+                    "wall_seconds": profile["wall_seconds"],
+                    "cpu_seconds": profile["cpu_seconds"],
+                    "peak_rss_mb": profile["peak_rss_mb"],
+                    "input_bytes": profile["input"]["artifact_bytes"],
+                    "output_bytes": profile["output"]["artifact_bytes"],
+                    "xcom_bytes": profile["output"]["payload_bytes"],
+                }
+                results.append(result)
+                print(f"rows={n_rows:<9} {result['stage']:<20} wall={result['wall_seconds']:8.2f}s  "
+                      f"cpu={result['cpu_seconds']:8.2f}s  peak={result['peak_rss_mb']:8.1f}MB  "
+                      f"in={result['input_bytes'] / 1e6:8.2f}MB  out={result['output_bytes'] / 1e6:8.2f}MB")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "params": params,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
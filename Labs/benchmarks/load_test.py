@@ -0,0 +1,323 @@
+"""
+Load-testing and latency benchmark for the FastAPI labs.
+
+Drives each app either in-process (ASGI transport, no network) or against a local
+uvicorn server at fixed concurrency levels, and reports throughput and p50/p95/p99
+latency per endpoint.
+
+Usage:
+    python load_test.py                                  # all apps, in-process
+    python load_test.py --apps fastapi_labs --uvicorn    # spawn a local uvicorn per app
+    python load_test.py --url http://127.0.0.1:8000 --apps fastapi_labs
+    python load_test.py --baseline baseline.json         # fail on p95 regressions
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+# Some apps configure root logging at INFO or DEBUG; keep the client's per-request lines out of the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+LABS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIABETES_ROW = {
+    "age": 0.038, "sex": 0.050, "bmi": 0.061, "bp": 0.021,
+    "total_serum_cholesterol": -0.044, "ldl_cholesterol": -0.034,
+    "hdl_cholesterol": -0.043, "cholesterol_hdl_ratio": -0.002,
+    "log_serum_triglycerides": 0.019, "blood_sugar_level": -0.017,
+}
+
+
+def _diabetes_row(i):
+    # Vary the payload so a prediction cache does not turn the benchmark into a lookup test
+    return {name: value + (i % 997) * 1e-4 for name, value in DIABETES_ROW.items()}
+
+
+# The Albums APIs reject duplicate ids, and the same request index recurs across levels
+_album_ids = itertools.count()
+
+
+def _album(i):
+    return {"id": f"bench-{next(_album_ids)}", "title": f"Album {i}", "artist": "Bench", "price": 9.99}
+
+
+# Endpoint scenarios per app: (name, method, path, body factory or None)
+APPS = {
+    "fastapi_labs": {
+        "src": "FastAPI_Labs/src",
+        "endpoints": [
+            ("GET /", "GET", "/", None),
+            ("POST /predict", "POST", "/predict", _diabetes_row),
+            ("POST /predict/batch", "POST", "/predict/batch",
+             lambda i: {"records": [_diabetes_row(i * 100 + j) for j in range(100)]}),
+        ],
+    },
+    "docker": {
+        "src": "Docker/src",
+        "endpoints": [
+            ("GET /albums", "GET", "/albums", None),
+            ("GET /albums/{id}", "GET", "/albums/1", None),
+            ("POST /albums", "POST", "/albums", _album),
+        ],
+    },
+    "terraform_lab": {
+        "src": "terraform_lab/src",
+        "endpoints": [
+            ("GET /albums", "GET", "/albums", None),
+            ("GET /albums/{id}", "GET", "/albums/1", None),
+            ("POST /albums", "POST", "/albums", _album),
+        ],
+    },
+    "github": {
+        "src": "Github/src",
+        "endpoints": [
+            ("GET /", "GET", "/", None),
+            ("POST /tasks", "POST", "/tasks", lambda i: {"title": f"Task {i}", "description": "bench"}),
+            ("GET /tasks/{id}", "GET", "/tasks/1", None),
+            ("GET /tasks", "GET", "/tasks", None),
+        ],
+    },
+    "logging": {
+        "src": "Logging/src",
+        "endpoints": [
+            ("GET /albums", "GET", "/albums", None),
+            ("GET /albums/{id}", "GET", "/albums/1", None),
+        ],
+    },
+}
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    Args:
+        sorted_values (list): Ascending values.
+        q (float): Percentile between 0 and 100.
+    Returns:
+        float: The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def load_module(name):
+    """
+    Import an app's main.py under a unique module name.
+    Args:
+        name (str): Key in APPS.
+    Returns:
+        module: The imported main.py.
+    """
+    src = os.path.join(LABS_DIR, APPS[name]["src"])
+    # Apps import their sibling modules by bare name (config, models, ...), and several apps
+    # use the same names. Hide other modules of those names while this app imports, and
+    # drop this app's afterwards, so each app binds to its own siblings.
+    siblings = {os.path.splitext(f)[0] for f in os.listdir(src) if f.endswith(".py")}
+    hidden = {n: sys.modules.pop(n) for n in siblings if n in sys.modules}
+    sys.path.insert(0, src)
+    spec = importlib.util.spec_from_file_location(f"bench_{name}_main", os.path.join(src, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(src)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(src)
+        for n in siblings:
+            sys.modules.pop(n, None)
+        sys.modules.update(hidden)
+    return module
+
+
+def load_app(name):
+    """
+    Import an app's main.py and return its FastAPI app.
+    Args:
+        name (str): Key in APPS.
+    Returns:
+        FastAPI: The app object.
+    """
+    return load_module(name).app
+
+
+@asynccontextmanager
+async def in_process_client(name):
+    app = load_app(name)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(name):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    src = os.path.join(LABS_DIR, APPS[name]["src"])
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=src,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    # Any HTTP answer means the server is accepting requests
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline or process.poll() is not None:
+                        raise RuntimeError(f"uvicorn for {name} did not start")
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@asynccontextmanager
+async def url_client(url):
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        yield client
+
+
+async def run_level(client, endpoint, concurrency, n_requests):
+    """
+    Send n_requests to one endpoint from `concurrency` concurrent workers.
+    Returns:
+        dict: Throughput, latency percentiles and error count.
+    """
+    _, method, path, body = endpoint
+    latencies = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            kwargs = {"json": body(i)} if body is not None else {}
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "errors": errors,
+        "throughput_rps": n_requests / elapsed if elapsed else 0.0,
+        "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+async def bench_app(name, client_factory, concurrency_levels, n_requests, warmup):
+    results = []
+    async with client_factory() as client:
+        for endpoint in APPS[name]["endpoints"]:
+            # Warm caches, lazy imports and connection pools before measuring
+            await run_level(client, endpoint, 1, warmup)
+            for concurrency in concurrency_levels:
+                level = await run_level(client, endpoint, concurrency, n_requests)
+                level.update(app=name, endpoint=endpoint[0])
+                results.append(level)
+                print(f"{name:<14} {endpoint[0]:<20} c={concurrency:<4} "
+                      f"{level['throughput_rps']:9.1f} req/s  p50={level['p50_ms']:7.2f}ms  "
+                      f"p95={level['p95_ms']:7.2f}ms  p99={level['p99_ms']:7.2f}ms  errors={level['errors']}")
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Compare p95 latencies with a previous run.
+    Returns:
+        list: Human-readable descriptions of regressions beyond the tolerance.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["app"], r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["app"], result["endpoint"], result["concurrency"]))
+        if previous and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result['app']} {result['endpoint']} c={result['concurrency']}: "
+                               f"p95 {previous['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FastAPI labs")
+    parser.add_argument("--apps", nargs="+", choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="spawn a local uvicorn server per app")
+    target.add_argument("--url", help="benchmark an already running server (requires a single --apps)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare p95 latency against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95 increase")
+    args = parser.parse_args()
+
+    if args.url and len(args.apps) != 1:
+        parser.error("--url needs exactly one app in --apps")
+
+    results = []
+    for name in args.apps:
+        if args.url:
+            factory = lambda: url_client(args.url)
+        elif args.uvicorn:
+            factory = lambda name=name: uvicorn_client(name)
+        else:
+            factory = lambda name=name: in_process_client(name)
+        results += asyncio.run(bench_app(name, factory, args.concurrency, args.requests, args.warmup))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "mode": "url" if args.url else "uvicorn" if args.uvicorn else "in-process",
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Multi-worker consistency and throughput test for the terraform_lab Albums API.
+
+Starts `uvicorn --workers N` for every album store backend and measures:
+  - read-your-writes: every album is created with POST and immediately fetched with
+    GET /albums/{id} on a new connection, which the kernel may hand to any worker;
+    a 404 means the worker that answered did not see the write.
+  - listing agreement: after the writes, GET /albums is requested on new connections and
+    the distinct ETags are counted; a consistent catalog has exactly one.
+  - throughput: a mixed workload (90% GET /albums/{id} of an existing album, 10% POST) over
+    keep-alive connections at a fixed concurrency.
+
+Usage:
+    python shared_store.py                                   # memory and sqlite, 1 and 4 workers
+    python shared_store.py --stores sqlite --workers 1 2 4 8 --concurrency 64
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from load_test import LABS_DIR, percentile
+
+SRC = os.path.join(LABS_DIR, "terraform_lab", "src")
+STORES = ("memory", "sqlite")
+
+# Never reuse a connection, so consecutive requests can land on different workers
+FRESH_CONNECTIONS = httpx.Limits(max_keepalive_connections=0)
+
+
+def start_server(store, workers, db_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, ALBUMS_STORE=store, ALBUMS_DB_PATH=db_path)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=SRC, env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(base_url, process, workers):
+    deadline = time.monotonic() + 60
+    async with httpx.AsyncClient(base_url=base_url, limits=FRESH_CONNECTIONS) as client:
+        while True:
+            try:
+                await client.get("/albums/1")
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.1)
+    # The first answer comes from the first worker up; give the others time to start
+    await asyncio.sleep(0.5 * workers)
+
+
+async def read_your_writes(base_url, n_albums, concurrency, ids):
+    """
+    Create n_albums albums and read each one back on a new connection.
+    Returns:
+        int: Reads that did not find the album just created.
+    """
+    misses = 0
+    counter = iter(range(n_albums))
+
+    async def worker(client):
+        nonlocal misses
+        for _ in counter:
+            album_id = f"ryw-{next(ids)}"
+            response = await client.post("/albums", json={"id": album_id, "title": "Consistency",
+                                                          "artist": "Bench", "price": 1.0})
+            response.raise_for_status()
+            misses += (await client.get(f"/albums/{album_id}")).status_code != 200
+
+    async with httpx.AsyncClient(base_url=base_url, limits=FRESH_CONNECTIONS, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return misses
+
+
+async def listing_agreement(base_url, n_requests):
+    """
+    Request the full listing on new connections.
+    Returns:
+        tuple: Number of distinct ETags, and the album counts seen.
+    """
+    etags, counts = set(), set()
+    async with httpx.AsyncClient(base_url=base_url, limits=FRESH_CONNECTIONS, timeout=30) as client:
+        for _ in range(n_requests):
+            response = await client.get("/albums")
+            etags.add(response.headers["etag"])
+            counts.add(len(response.json()))
+    return len(etags), sorted(counts)
+
+
+async def mixed_throughput(base_url, n_requests, concurrency, ids):
+    """
+    Run the 90% read / 10% write workload over keep-alive connections.
+    Returns:
+        dict: Throughput, latency percentiles and failed requests.
+    """
+    known = ["1", "2", "3"]
+    latencies = []
+    failures = 0
+    counter = iter(range(n_requests))
+    rng = random.Random(0)
+
+    async def worker(client):
+        nonlocal failures
+        for _ in counter:
+            start = time.perf_counter()
+            if rng.random() < 0.1:
+                album_id = f"mix-{next(ids)}"
+                response = await client.post("/albums", json={"id": album_id, "title": "Mixed",
+                                                              "artist": "Bench", "price": 2.0})
+                if response.status_code == 201:
+                    known.append(album_id)
+            else:
+                response = await client.get(f"/albums/{rng.choice(known)}")
+            latencies.append(time.perf_counter() - start)
+            failures += response.status_code >= 400
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput_rps": n_requests / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "failed": failures,
+    }
+
+
+async def bench(store, workers, args, tmp_dir):
+    db_path = os.path.join(tmp_dir, f"albums_{store}_{workers}.db")
+    process, base_url = start_server(store, workers, db_path)
+    ids = itertools.count()
+    try:
+        await wait_ready(base_url, process, workers)
+        misses = await read_your_writes(base_url, args.albums, args.concurrency, ids)
+        n_etags, counts = await listing_agreement(base_url, args.listings)
+        mixed = await mixed_throughput(base_url, args.requests, args.concurrency, ids)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    result = {"store": store, "workers": workers, "read_misses": misses, "reads": args.albums,
+              "distinct_listings": n_etags, "listing_sizes": counts, **mixed}
+    print(f"{store:<7} workers={workers:<3} read-your-writes misses={misses}/{args.albums}  "
+          f"listings={n_etags} distinct (sizes {counts[0]}..{counts[-1]})  "
+          f"mixed={mixed['throughput_rps']:8.1f} req/s  p50={mixed['p50_ms']:6.2f}ms  "
+          f"p95={mixed['p95_ms']:6.2f}ms  failed={mixed['failed']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker consistency and throughput of the album stores")
+    parser.add_argument("--stores", nargs="+", choices=STORES, default=list(STORES))
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--albums", type=int, default=500, help="albums created in the read-your-writes check")
+    parser.add_argument("--listings", type=int, default=50, help="listing requests in the agreement check")
+    parser.add_argument("--requests", type=int, default=5000, help="requests in the mixed workload")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for store in args.stores:
+            for workers in args.workers:
+                results.append(asyncio.run(bench(store, workers, args, tmp_dir)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
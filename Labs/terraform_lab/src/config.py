@@ -0,0 +1,8 @@
+import os
+
+# Album storage backend: "memory" keeps the catalog in this process, "sqlite" shares it
+# between all workers and replicas that can reach ALBUMS_DB_PATH
+ALBUMS_STORE = os.getenv("ALBUMS_STORE", "memory").lower()
+ALBUMS_DB_PATH = os.getenv("ALBUMS_DB_PATH", "albums.db")
+# SQLite connections kept open per worker process
+ALBUMS_DB_POOL_SIZE = int(os.getenv("ALBUMS_DB_POOL_SIZE", "4"))
@@ -1,80 +1,157 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+import itertools
+import hashlib
+import json
 import uvicorn
+from config import ALBUMS_STORE, ALBUMS_DB_PATH, ALBUMS_DB_POOL_SIZE
+from models import Album, AlbumUpdate
+from storage import open_store
 
-# Album model using Pydantic for request/response validation
-class Album(BaseModel):
-    id: str
-    title: str
-    artist: str
-    price: float
+# Albums are serialized from their field dict (vars(album) is what model_dump() returns for
+# this flat model, without the per-object validation overhead)
+try:
+    # Several times faster than the standard library for large listings
+    import orjson
 
-# Update model (for PUT requests where ID might not be in body)
-class AlbumUpdate(BaseModel):
-    title: str
-    artist: str
-    price: float
+    def dumps(value) -> bytes:
+        return orjson.dumps(value)
+except ImportError:
+    def dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
 
 # Initialize FastAPI app
 app = FastAPI(title="Albums API", version="1.0.0")
 
-albums = [
+# Album storage, selected by ALBUMS_STORE; the seed albums are added when the store is created
+albums = open_store(ALBUMS_STORE, ALBUMS_DB_PATH, ALBUMS_DB_POOL_SIZE, seed=[
     Album(id="1", title="Life of a Showgirl", artist="Taylor Swift", price=13.99),
     Album(id="2", title="Brat", artist="Charli XCX", price=17.99),
     Album(id="3", title="Hurry Up Tomorrow", artist="Weeknd", price=19.99),
-]
+])
+
+# Cursor pagination: the cursor of an album is its insertion sequence number, so a page
+# boundary stays valid while albums before it are added or deleted
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Albums serialized per chunk of an NDJSON stream
+NDJSON_BATCH = 500
+
+def paginate(pairs, limit: int):
+    """Take one page from (cursor, album) pairs; return its albums and the next page's cursor, or None"""
+    page = list(itertools.islice(pairs, limit + 1))
+    next_cursor = page[limit - 1][0] if len(page) > limit else None
+    return [album for _, album in page[:limit]], next_cursor
+
+def ndjson_stream(items):
+    """Serialize albums as NDJSON lines, a batch per chunk, so memory does not grow with the catalog"""
+    batch = []
+    for album in items:
+        batch.append(dumps(vars(album)))
+        if len(batch) == NDJSON_BATCH:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+# Serialized body of the full listing, rebuilt only after the catalog changed
+# Keyed by the store as well as its version: a replaced store (tests, a reconfigured app)
+# starts its own version count, and a new SQLite file can reach the same number
+_listing_cache = {"store": None, "version": None, "body": b"", "etag": ""}
+
+def cached_listing():
+    """Return the JSON body and ETag of all albums, serializing at most once per catalog version"""
+    # Read the version before the albums: with a shared store another worker may write in
+    # between, and the body must never be labelled with a version newer than its contents
+    store = albums
+    version = store.version
+    if _listing_cache["store"] is not store or _listing_cache["version"] != version:
+        body = dumps([vars(album) for album in store.list()])
+        _listing_cache.update(
+            store=store,
+            version=version,
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        )
+    return _listing_cache["body"], _listing_cache["etag"]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as for GET)"""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+# The handlers are plain functions: FastAPI runs them in its threadpool, so a store call that
+# waits (a SQLite write lock, a busy connection pool) never blocks the event loop
 
 # GET /albums - Get all albums
 @app.get("/albums", response_model=List[Album])
-async def get_albums():
-    """Get all albums"""
-    return albums
+def get_albums(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), after: Optional[int] = None,
+               format: str = Query("json", pattern="^(json|ndjson)$"),
+               if_none_match: Optional[str] = Header(None)):
+    """Get all albums.
+
+    With limit or after, one page is returned and the cursor of the next page is sent in
+    the X-Next-Cursor header. format=ndjson streams one album per line.
+    """
+    paginated = limit is not None or after is not None
+    if not paginated and format == "json":
+        body, etag = cached_listing()
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    pairs = albums.iter_from(after)
+    headers = {}
+    if paginated:
+        items, next_cursor = paginate(pairs, limit or DEFAULT_PAGE_SIZE)
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+    else:
+        items = (album for _, album in pairs)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_stream(items), media_type="application/x-ndjson", headers=headers)
+    return Response(content=dumps([vars(album) for album in items]), media_type="application/json", headers=headers)
 
 # POST /albums - Create a new album
 @app.post("/albums", response_model=Album, status_code=201)
-async def post_albums(album: Album):
+def post_albums(album: Album):
     """Add a new album"""
-    albums.append(album)
+    if not albums.add(album):
+        raise HTTPException(status_code=409, detail="album already exists")
     return album
 
 # GET /albums/{id} - Get album by ID
 @app.get("/albums/{id}", response_model=Album)
-async def get_album_by_id(id: str):
+def get_album_by_id(id: str):
     """Get a specific album by ID"""
-    for album in albums:
-        if album.id == id:
-            return album
-    raise HTTPException(status_code=404, detail="album not found")
+    album = albums.get(id)
+    if album is None:
+        raise HTTPException(status_code=404, detail="album not found")
+    return album
 
 # PUT /albums/{id} - Update an existing album
 @app.put("/albums/{id}", response_model=Album)
-async def update_existing_album(id: str, updated_album: AlbumUpdate):
+def update_existing_album(id: str, updated_album: AlbumUpdate):
     """Update an existing album"""
-    for i, album in enumerate(albums):
-        if album.id == id:
-            # Update the album fields
-            albums[i].title = updated_album.title
-            albums[i].artist = updated_album.artist
-            albums[i].price = updated_album.price
-            return albums[i]
-    
-    raise HTTPException(status_code=404, detail="album not found")
+    album = albums.update(id, updated_album)
+    if album is None:
+        raise HTTPException(status_code=404, detail="album not found")
+    return album
 
 # DELETE /albums/{id} - Delete an album
 @app.delete("/albums/{id}")
-async def delete_album(id: str):
+def delete_album(id: str):
     """Delete an album by ID"""
-    for i, album in enumerate(albums):
-        if album.id == id:
-            albums.pop(i)
-            return {"message": "album deleted successfully"}
-    
-    raise HTTPException(status_code=404, detail="album not found")
+    if not albums.delete(id):
+        raise HTTPException(status_code=404, detail="album not found")
+    return {"message": "album deleted successfully"}
 
 def print_this():
     if albums:
-        print(albums[0].id)
+        print(albums.list()[0].id)
 
 # Main entry point
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+# Album model using Pydantic for request/response validation
+class Album(BaseModel):
+    id: str
+    title: str
+    artist: str
+    price: float
+
+# Update model (for PUT requests where ID might not be in body)
+class AlbumUpdate(BaseModel):
+    title: str
+    artist: str
+    price: float
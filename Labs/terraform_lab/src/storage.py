@@ -0,0 +1,323 @@
+import itertools
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from models import Album, AlbumUpdate
+
+# Rows fetched per query when iterating over a SQLite catalog
+SQLITE_BATCH = 500
+
+
+class AlbumStore(ABC):
+    """
+    Storage backend of the Albums API. Albums are listed in insertion order, and every album
+    has a cursor (an integer that grows with insertion order and is never reused) so listings
+    can be resumed after any album, including one that was deleted since.
+    """
+
+    @property
+    @abstractmethod
+    def version(self) -> int:
+        """Counter bumped on every change to the catalog; keys cached responses"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def list(self) -> List[Album]:
+        """Return all albums in insertion order"""
+
+    @abstractmethod
+    def get(self, id: str) -> Optional[Album]:
+        """Return the album with this id, or None"""
+
+    @abstractmethod
+    def add(self, album: Album) -> bool:
+        """Add an album; return False if its id is already taken"""
+
+    @abstractmethod
+    def update(self, id: str, fields: AlbumUpdate) -> Optional[Album]:
+        """Update an album; return None if it does not exist"""
+
+    @abstractmethod
+    def delete(self, id: str) -> bool:
+        """Delete an album; return False if it does not exist"""
+
+    @abstractmethod
+    def clear(self):
+        """Delete all albums"""
+
+    @abstractmethod
+    def iter_from(self, after: Optional[int] = None) -> Iterator[Tuple[int, Album]]:
+        """Yield (cursor, album) pairs in insertion order, starting after a cursor"""
+
+
+# In-memory album store: a dict keyed by id gives O(1) lookup, update and delete,
+# and keeps insertion order for listing. Every worker process has its own copy.
+# Changes are serialized with a lock, since the handlers run in a threadpool.
+class MemoryAlbumStore(AlbumStore):
+    def __init__(self, albums=()):
+        self._lock = threading.Lock()
+        # Bumped on every mutation; never goes back, so it can key cached responses
+        self._version = 0
+        # Source of cursors; not reset by clear() so old cursors never point at new albums
+        self._counter = itertools.count()
+        self.clear()
+        for album in albums:
+            self.add(album)
+
+    @property
+    def version(self):
+        return self._version
+
+    def __len__(self):
+        return len(self._albums)
+
+    def list(self):
+        return list(self._albums.values())
+
+    def get(self, id):
+        return self._albums.get(id)
+
+    def add(self, album):
+        with self._lock:
+            if album.id in self._albums:
+                return False
+            self._version += 1
+            self._albums[album.id] = album
+            seq = next(self._counter)
+            self._order[album.id] = seq
+            self._seqs.append(seq)
+            self._seq_ids.append(album.id)
+            return True
+
+    def update(self, id, fields):
+        with self._lock:
+            album = self._albums.get(id)
+            if album is None:
+                return None
+            self._version += 1
+            album.title = fields.title
+            album.artist = fields.artist
+            album.price = fields.price
+            return album
+
+    def delete(self, id):
+        with self._lock:
+            if self._albums.pop(id, None) is None:
+                return False
+            self._version += 1
+            del self._order[id]
+            self._stale += 1
+            # Drop deleted entries from the cursor lists once they make up half of them
+            if self._stale > 1024 and 2 * self._stale > len(self._seqs):
+                self._compact()
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._albums = {}
+            # Insertion sequence number per id, and the sequence numbers and ids in insertion order
+            self._order = {}
+            self._seqs = []
+            self._seq_ids = []
+            self._stale = 0
+
+    def iter_from(self, after=None):
+        # Compaction swaps in new lists, so an iteration in progress keeps its own references
+        seqs, ids = self._seqs, self._seq_ids
+        start = 0 if after is None else bisect_right(seqs, after)
+        for i in range(start, len(seqs)):
+            # Deleted albums stay in the lists until compaction; a re-added id has a newer cursor
+            if self._order.get(ids[i]) == seqs[i]:
+                album = self._albums.get(ids[i])
+                if album is not None:
+                    yield seqs[i], album
+
+    def _compact(self):
+        live = [(seq, id) for seq, id in zip(self._seqs, self._seq_ids) if self._order.get(id) == seq]
+        self._seqs = [seq for seq, _ in live]
+        self._seq_ids = [id for _, id in live]
+        self._stale = 0
+
+
+class ConnectionPool:
+    """
+    Fixed set of SQLite connections shared by the threads of one process.
+    Args:
+        path (str): Database file.
+        size (int): Number of connections.
+    """
+
+    def __init__(self, path, size=4):
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(self._connect(path))
+
+    @staticmethod
+    def _connect(path):
+        # Autocommit mode: transactions are opened explicitly, so writers take the lock up front
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        # Readers never block the writer and see the last committed catalog
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Commits survive a crash of the process; only an OS crash can lose the last ones
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one to be returned if all are in use"""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection inside a write transaction, committed on success"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+# SQLite album store in WAL mode: every worker process and replica that opens the same
+# database file sees the same catalog. The rowid is the cursor; AUTOINCREMENT keeps
+# rowids of deleted albums from being reused.
+class SQLiteAlbumStore(AlbumStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS albums ("
+        " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " id TEXT NOT NULL UNIQUE,"
+        " title TEXT NOT NULL,"
+        " artist TEXT NOT NULL,"
+        " price REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    )
+
+    def __init__(self, path, pool_size=4, seed=()):
+        """
+        Open (and on first use create) the catalog database.
+        Args:
+            path (str): Database file.
+            pool_size (int): Connections kept open by this process.
+            seed (iterable): Albums added when the database is created.
+        """
+        self.path = path
+        self._pool = ConnectionPool(path, pool_size)
+        with self._pool.transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            created = conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)").rowcount
+            # Only the first process to open the database seeds it, and only once
+            if created:
+                conn.executemany("INSERT INTO albums (id, title, artist, price) VALUES (?, ?, ?, ?)",
+                                 [(a.id, a.title, a.artist, a.price) for a in seed])
+
+    @staticmethod
+    def _album(row):
+        # Rows were validated on the way in
+        return Album.model_construct(id=row[0], title=row[1], artist=row[2], price=row[3])
+
+    @staticmethod
+    def _bump(conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    @property
+    def version(self):
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def __len__(self):
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM albums").fetchone()[0]
+
+    def list(self):
+        with self._pool.connection() as conn:
+            rows = conn.execute("SELECT id, title, artist, price FROM albums ORDER BY seq").fetchall()
+        return [self._album(row) for row in rows]
+
+    def get(self, id):
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT id, title, artist, price FROM albums WHERE id = ?", (id,)).fetchone()
+        return None if row is None else self._album(row)
+
+    def add(self, album):
+        with self._pool.transaction() as conn:
+            added = conn.execute("INSERT OR IGNORE INTO albums (id, title, artist, price) VALUES (?, ?, ?, ?)",
+                                 (album.id, album.title, album.artist, album.price)).rowcount
+            if added:
+                self._bump(conn)
+        return bool(added)
+
+    def update(self, id, fields):
+        with self._pool.transaction() as conn:
+            updated = conn.execute("UPDATE albums SET title = ?, artist = ?, price = ? WHERE id = ?",
+                                   (fields.title, fields.artist, fields.price, id)).rowcount
+            if not updated:
+                return None
+            self._bump(conn)
+        return Album(id=id, title=fields.title, artist=fields.artist, price=fields.price)
+
+    def delete(self, id):
+        with self._pool.transaction() as conn:
+            deleted = conn.execute("DELETE FROM albums WHERE id = ?", (id,)).rowcount
+            if deleted:
+                self._bump(conn)
+        return bool(deleted)
+
+    def clear(self):
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM albums")
+            self._bump(conn)
+
+    def iter_from(self, after=None):
+        # One short query per batch, so a slow client never holds a connection or a snapshot
+        after = -1 if after is None else after
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute("SELECT seq, id, title, artist, price FROM albums WHERE seq > ? "
+                                    "ORDER BY seq LIMIT ?", (after, SQLITE_BATCH)).fetchall()
+            for row in rows:
+                yield row[0], self._album(row[1:])
+            if len(rows) < SQLITE_BATCH:
+                return
+            after = rows[-1][0]
+
+    def close(self):
+        self._pool.close()
+
+
+def open_store(backend, path=None, pool_size=4, seed=()):
+    """
+    Create the album store selected by configuration.
+    Args:
+        backend (str): "memory" or "sqlite".
+        path (str): Database file, for "sqlite".
+        pool_size (int): Connections per process, for "sqlite".
+        seed (iterable): Initial albums of a new store.
+    Returns:
+        AlbumStore: The store.
+    """
+    if backend == "memory":
+        return MemoryAlbumStore(seed)
+    if backend == "sqlite":
+        return SQLiteAlbumStore(path, pool_size, seed)
+    raise ValueError(f"unknown album store {backend!r}; expected 'memory' or 'sqlite'")
@@ -0,0 +1,80 @@
+import inspect
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from models import Album
+from storage import open_store
+from test_storage import SEED
+
+client = TestClient(main.app)
+
+
+@pytest.fixture(params=["memory", "sqlite"], autouse=True)
+def store(request, tmp_path, monkeypatch):
+    """Serve the API from a fresh store of each backend"""
+    store = open_store(request.param, str(tmp_path / "albums.db"), pool_size=2, seed=SEED)
+    monkeypatch.setattr(main, "albums", store)
+    yield store
+
+
+def test_crud():
+    """Test create, read, update and delete through the API"""
+    album = {"id": "4", "title": "New", "artist": "Band", "price": 9.5}
+    assert client.post("/albums", json=album).status_code == 201
+    assert client.post("/albums", json=album).status_code == 409
+    assert client.get("/albums/4").json() == album
+    response = client.put("/albums/4", json={"title": "Renamed", "artist": "Band", "price": 8.0})
+    assert response.json()["title"] == "Renamed"
+    assert client.put("/albums/99", json={"title": "T", "artist": "A", "price": 1.0}).status_code == 404
+    assert client.delete("/albums/4").status_code == 200
+    assert client.get("/albums/4").status_code == 404
+    assert client.delete("/albums/4").status_code == 404
+
+
+def test_pagination_and_ndjson(store):
+    """Test walking all albums page by page, across a delete"""
+    for i in range(4, 30):
+        store.add(main.Album(id=str(i), title="T", artist="A", price=1.0))
+    seen, after = [], None
+    while True:
+        params = {"limit": 7} if after is None else {"limit": 7, "after": after}
+        response = client.get("/albums", params=params)
+        seen += [album["id"] for album in response.json()]
+        after = response.headers.get("x-next-cursor")
+        if after is None:
+            break
+        if len(seen) == 7:
+            client.delete("/albums/8")
+    assert seen == [str(i) for i in range(1, 30) if i != 8]
+    lines = client.get("/albums", params={"format": "ndjson"}).text.splitlines()
+    assert len(lines) == 28
+
+
+def test_listing_etag_follows_writes():
+    """Test that the cached listing is revalidated after a change"""
+    etag = client.get("/albums").headers["etag"]
+    assert client.get("/albums", headers={"If-None-Match": etag}).status_code == 304
+    client.delete("/albums/1")
+    response = client.get("/albums", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [album["id"] for album in response.json()] == ["2", "3"]
+
+
+def test_listing_cache_follows_store(monkeypatch):
+    """Test that a replaced store at the same version is never served the old listing"""
+    first = open_store("memory", seed=SEED)
+    second = open_store("memory", seed=[Album(id="9", title="Other", artist="Band", price=1.0), *SEED[1:]])
+    assert first.version == second.version
+    monkeypatch.setattr(main, "albums", first)
+    assert client.get("/albums").json()[0]["id"] == "1"
+    monkeypatch.setattr(main, "albums", second)
+    assert client.get("/albums").json()[0]["id"] == "9"
+
+
+def test_handlers_run_in_threadpool():
+    """Test that no handler blocks the event loop on a store call"""
+    for route in main.app.routes:
+        if route.path.startswith("/albums"):
+            assert not inspect.iscoroutinefunction(route.endpoint), route.path
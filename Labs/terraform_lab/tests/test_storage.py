@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+from models import Album, AlbumUpdate
+from storage import MemoryAlbumStore, SQLiteAlbumStore, open_store
+
+SEED = [
+    Album(id="1", title="Life of a Showgirl", artist="Taylor Swift", price=13.99),
+    Album(id="2", title="Brat", artist="Charli XCX", price=17.99),
+    Album(id="3", title="Hurry Up Tomorrow", artist="Weeknd", price=19.99),
+]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """A seeded store of each backend"""
+    store = open_store(request.param, str(tmp_path / "albums.db"), pool_size=2, seed=SEED)
+    yield store
+    if hasattr(store, "close"):
+        store.close()
+
+
+def ids(albums):
+    return [album.id for album in albums]
+
+
+def test_seeded(store):
+    """Test that a new store holds the seed albums in order"""
+    assert len(store) == 3
+    assert ids(store.list()) == ["1", "2", "3"]
+
+
+def test_add_and_get(store):
+    """Test adding an album and rejecting a duplicate id"""
+    version = store.version
+    assert store.add(Album(id="4", title="New", artist="Band", price=9.5))
+    assert not store.add(Album(id="4", title="Other", artist="Band", price=1.0))
+    assert store.get("4") == Album(id="4", title="New", artist="Band", price=9.5)
+    assert store.get("missing") is None
+    assert store.version > version
+
+
+def test_update(store):
+    """Test updating an existing and a missing album"""
+    updated = store.update("2", AlbumUpdate(title="Brat Remixed", artist="Charli", price=5.0))
+    assert updated == Album(id="2", title="Brat Remixed", artist="Charli", price=5.0)
+    assert store.get("2") == updated
+    version = store.version
+    assert store.update("missing", AlbumUpdate(title="T", artist="A", price=1.0)) is None
+    assert store.version == version
+
+
+def test_delete_and_clear(store):
+    """Test deleting single albums and clearing the store"""
+    assert store.delete("1")
+    assert not store.delete("1")
+    assert ids(store.list()) == ["2", "3"]
+    store.clear()
+    assert len(store) == 0
+    assert store.list() == []
+
+
+def test_iter_from_pages(store):
+    """Test resuming a listing after any cursor, in insertion order"""
+    for i in range(4, 1300):
+        store.add(Album(id=str(i), title="T", artist="A", price=1.0))
+    pairs = list(store.iter_from())
+    assert ids(album for _, album in pairs) == [str(i) for i in range(1, 1300)]
+    cursors = [cursor for cursor, _ in pairs]
+    assert cursors == sorted(cursors)
+    after = cursors[700]
+    assert ids(album for _, album in store.iter_from(after)) == [str(i) for i in range(702, 1300)]
+
+
+def test_cursor_survives_delete_and_readd(store):
+    """Test that deleted albums are skipped and a re-added id gets a newer cursor"""
+    cursor_of_2 = dict((album.id, cursor) for cursor, album in store.iter_from())["2"]
+    store.delete("2")
+    store.delete("3")
+    store.add(Album(id="2", title="Brat", artist="Charli XCX", price=17.99))
+    assert ids(album for _, album in store.iter_from(cursor_of_2)) == ["2"]
+    assert ids(store.list()) == ["1", "2"]
+
+
+def test_cursors_not_reused_after_clear(store):
+    """Test that cursors handed out before clear() do not point at new albums"""
+    last = max(cursor for cursor, _ in store.iter_from())
+    store.clear()
+    store.add(Album(id="9", title="T", artist="A", price=1.0))
+    assert [cursor for cursor, _ in store.iter_from()][0] > last
+
+
+def test_concurrent_adds(store):
+    """Test that albums added from several threads are all stored once"""
+    def add_range(start):
+        for i in range(start, start + 200):
+            store.add(Album(id=f"t{i}", title="T", artist="A", price=1.0))
+
+    threads = [threading.Thread(target=add_range, args=(n * 200,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 803
+    assert len({album.id for _, album in store.iter_from()}) == 803
+
+
+def test_sqlite_shared_between_stores(tmp_path):
+    """Test that two stores on one database file (as two workers) see each other's writes"""
+    path = str(tmp_path / "shared.db")
+    first = SQLiteAlbumStore(path, seed=SEED)
+    second = SQLiteAlbumStore(path, seed=SEED)
+    assert len(second) == 3  # seeded only once
+    first.add(Album(id="4", title="New", artist="Band", price=9.5))
+    assert second.get("4") is not None
+    assert second.version == first.version
+    second.delete("4")
+    assert first.get("4") is None
+    first.close()
+    second.close()
+
+
+def test_unknown_backend():
+    """Test that a misconfigured backend is reported"""
+    with pytest.raises(ValueError):
+        open_store("redis")
+
+
+def test_memory_store_is_default_type():
+    """Test that the memory backend is the dict-backed store"""
+    assert isinstance(open_store("memory"), MemoryAlbumStore)